@@ -0,0 +1,170 @@
+"""Benchmark SifelyCoordinator polling paths against the local fake cloud.
+
+For each lock count, measures sweep latency, requests per sweep, the longest
+event-loop stall and memory held per lock for the lock list, details, open
+state and history sweeps. Requires homeassistant and aiohttp:
+
+    python -m benchmarks.bench_coordinator --locks 5 50 500 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from custom_components.sifely_cloud.const import (
+    CONF_APX_NUM_LOCKS,
+    CONF_CLIENT_ID,
+    CONF_EMAIL,
+    CONF_HISTORY_ENTRIES,
+    CONF_PASSWORD,
+)
+from custom_components.sifely_cloud.history_utils import SifelyHistoryStore, fetch_and_update_lock_history
+from custom_components.sifely_cloud.sifely import SifelyCoordinator
+from custom_components.sifely_cloud.sifely_api import SifelyApiClient
+from custom_components.sifely_cloud.token_manager import SifelyTokenManager
+
+from .fake_sifely_cloud import FakeSifelyCloud
+
+
+class LoopLagMonitor:
+    """Measures the longest time the event loop was blocked while running."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, loop.time() - expected)
+
+    def start(self):
+        self.max_lag = 0.0
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> float:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return self.max_lag
+
+
+async def _measure(name: str, cloud: FakeSifelyCloud, monitor: LoopLagMonitor, func) -> dict:
+    before = sum(cloud.requests.values())
+    injected_before = sum(cloud.injected.values())
+    monitor.start()
+    started = time.perf_counter()
+    await func()
+    elapsed = time.perf_counter() - started
+    lag = await monitor.stop()
+    return {
+        "sweep": name,
+        "seconds": elapsed,
+        "requests": sum(cloud.requests.values()) - before,
+        "injected": sum(cloud.injected.values()) - injected_before,
+        "max_loop_lag_ms": lag * 1000,
+    }
+
+
+async def bench(num_locks: int, args) -> list[dict]:
+    cloud = FakeSifelyCloud(
+        num_locks=num_locks,
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        busy_rate=args.busy_rate,
+        unauthorized_rate=args.unauthorized_rate,
+    )
+    base_url = await cloud.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        entry = SimpleNamespace(
+            entry_id=f"benchmark_{num_locks}",
+            options={
+                CONF_EMAIL: "bench@example.com",
+                CONF_PASSWORD: "secret",
+                CONF_CLIENT_ID: "bench",
+                CONF_APX_NUM_LOCKS: num_locks,
+                CONF_HISTORY_ENTRIES: 20,
+            },
+        )
+        # Token persistence normally goes through the config entry registry
+        hass.config_entries = SimpleNamespace(
+            async_update_entry=lambda config_entry, options: setattr(config_entry, "options", options)
+        )
+
+        async with aiohttp.ClientSession() as session:
+            api = SifelyApiClient(session, base_url=base_url)
+            token_manager = SifelyTokenManager(
+                client_id="bench", email="bench@example.com", password="secret",
+                api=api, hass=hass, config_entry=entry,
+            )
+            await token_manager.initialize()
+
+            coordinator = SifelyCoordinator(hass, token_manager, entry)
+            coordinator.history_store = SifelyHistoryStore(os.path.join(config_dir, "history.db"))
+            await coordinator.async_open_history_store()
+            monitor = LoopLagMonitor()
+
+            async def _history_sweep():
+                for lock_id in coordinator._lock_ids():
+                    await fetch_and_update_lock_history(coordinator, lock_id)
+
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            results = [
+                await _measure("lock_list", cloud, monitor, coordinator.async_fetch_lock_list),
+                await _measure("details", cloud, monitor, coordinator.async_query_lock_details),
+                await _measure("open_state", cloud, monitor, lambda: coordinator.async_query_open_state(force=True)),
+                await _measure("history", cloud, monitor, _history_sweep),
+                await _measure("history_idle", cloud, monitor, _history_sweep),
+            ]
+            held = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+
+            cloud.expire_tokens()
+            results.append(await _measure("open_state_after_expiry", cloud, monitor, lambda: coordinator.async_query_open_state(force=True)))
+
+            coordinator.scheduler.async_stop()
+            await token_manager.async_shutdown()
+            await coordinator.async_close_history_store()
+
+        await hass.async_stop(force=True)
+
+    await cloud.stop()
+    for result in results:
+        result["locks"] = num_locks
+        result["bytes_per_lock"] = held // max(num_locks, 1)
+    return results
+
+
+async def main(args):
+    print(f"{'locks':>6} {'sweep':<24} {'seconds':>9} {'requests':>9} {'401/busy':>9} {'loop lag ms':>12} {'bytes/lock':>11}")
+    for num_locks in args.locks:
+        for r in await bench(num_locks, args):
+            print(
+                f"{r['locks']:>6} {r['sweep']:<24} {r['seconds']:>9.3f} {r['requests']:>9} {r['injected']:>9} "
+                f"{r['max_loop_lag_ms']:>12.1f} {r['bytes_per_lock']:>11}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locks", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--busy-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,316 @@
+"""Local stand-in for the Sifely cloud endpoints, for offline benchmarking.
+
+Serves the endpoints from const.py on a local aiohttp server and can simulate
+any number of locks, response latency, -3003 gateway-busy responses, random
+401s and access-token expiry. With a callback URL it also acts as the push
+sender, posting Sifely/TTLock lock-event callbacks for every lock/unlock. Run it
+on its own with:
+
+    python -m benchmarks.fake_sifely_cloud --locks 50 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import aiohttp
+from aiohttp import web
+
+from custom_components.sifely_cloud.const import (
+    TOKEN_ENDPOINT,
+    REFRESH_ENDPOINT,
+    KEYLIST_ENDPOINT,
+    LOCK_DETAIL_ENDPOINT,
+    QUERY_STATE_ENDPOINT,
+    LOCK_ENDPOINT,
+    UNLOCK_ENDPOINT,
+    LOCK_HISTORY_ENDPOINT,
+    LOCK_GATEWAYS_ENDPOINT,
+)
+
+GATEWAY_BUSY = -3003
+FIRST_LOCK_ID = 1000000
+
+
+def _path(endpoint: str) -> str:
+    return urlparse(endpoint).path
+
+
+class FakeSifelyCloud:
+    """In-process fake of the Sifely cloud API."""
+
+    def __init__(
+        self,
+        num_locks: int = 5,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        busy_rate: float = 0.0,
+        unauthorized_rate: float = 0.0,
+        token_ttl: int = 7200,
+        locks_per_gateway: int = 1,
+        history_per_lock: int = 50,
+        callback_url: str | None = None,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.busy_rate = busy_rate
+        self.unauthorized_rate = unauthorized_rate
+        self.token_ttl = token_ttl
+        self.callback_url = callback_url
+        self.random = random.Random(seed)
+
+        self.requests = Counter()
+        self.injected = Counter()  # 401 and busy responses served, on top of the requests above
+        self.tokens = {}
+        self.refresh_tokens = set()
+        self.locks = {}
+        self.history = {}
+        self.gateways = {}
+        now_ms = int(time.time() * 1000)
+        for i in range(num_locks):
+            lock_id = FIRST_LOCK_ID + i
+            self.locks[lock_id] = {
+                "lockId": lock_id,
+                "lockAlias": f"Fake Lock {i + 1}",
+                "lockName": "FakeLock",
+                "lockMac": f"AA:BB:CC:{i >> 16 & 0xFF:02X}:{i >> 8 & 0xFF:02X}:{i & 0xFF:02X}",
+                "electricQuantity": 100 - i % 60,
+                "privacyLock": 0,
+                "tamperAlert": 0,
+                "state": 0,
+            }
+            self.gateways[lock_id] = [{
+                "gatewayId": 500000 + i // max(locks_per_gateway, 1),
+                "gatewayName": f"Fake Gateway {i // max(locks_per_gateway, 1) + 1}",
+                "rssi": -60,
+            }]
+            self.history[lock_id] = [
+                {
+                    "recordId": lock_id * 10000 + n,
+                    "lockId": lock_id,
+                    "lockDate": now_ms - (history_per_lock - n) * 60000,
+                    "username": f"user{n % 5}",
+                    "recordType": 11,
+                    "success": 1,
+                }
+                for n in range(history_per_lock)
+            ][::-1]
+
+        self.app = web.Application()
+        self.app.router.add_post(_path(TOKEN_ENDPOINT), self._login)
+        self.app.router.add_post(_path(REFRESH_ENDPOINT), self._refresh)
+        self.app.router.add_post(_path(KEYLIST_ENDPOINT), self._key_list)
+        self.app.router.add_get(_path(LOCK_DETAIL_ENDPOINT), self._detail)
+        self.app.router.add_get(_path(QUERY_STATE_ENDPOINT), self._state)
+        self.app.router.add_post(_path(LOCK_ENDPOINT), self._lock)
+        self.app.router.add_post(_path(UNLOCK_ENDPOINT), self._unlock)
+        self.app.router.add_get(_path(LOCK_HISTORY_ENDPOINT), self._records)
+        self.app.router.add_get(_path(LOCK_GATEWAYS_ENDPOINT), self._gateways)
+        self._runner = None
+        self.base_url = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def expire_tokens(self):
+        """Expire every issued access token, forcing clients through a refresh."""
+        self.tokens = {token: 0 for token in self.tokens}
+
+    def add_history(self, lock_id: int, count: int = 1, record_type: int = 11) -> list[dict]:
+        """Append new history records to a lock and return them."""
+        records = self.history[lock_id]
+        next_id = (records[0]["recordId"] + 1) if records else lock_id * 10000
+        added = []
+        for n in range(count):
+            record = {
+                "recordId": next_id + n,
+                "lockId": lock_id,
+                "lockDate": int(time.time() * 1000),
+                "username": "fake",
+                "recordType": record_type,
+                "success": 1,
+            }
+            records.insert(0, record)
+            added.append(record)
+        return added
+
+    async def simulate_activity(self, lock_id: int, lock: bool) -> list[dict]:
+        """Lock or unlock a lock "by hand": change its state, log it and push the callback."""
+        self.locks[lock_id]["state"] = 0 if lock else 1
+        records = self.add_history(lock_id, record_type=11 if lock else 1)
+        if self.callback_url:
+            await send_lock_callback(self.callback_url, lock_id, records)
+        return records
+
+    async def _respond(self, request: web.Request, endpoint: str):
+        """Count the request, apply latency and return an error response if one is due."""
+        self.requests[endpoint] += 1
+        delay = self.latency + self.random.uniform(0, self.latency_jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if endpoint in ("login", "refresh"):
+            return None
+
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if self.tokens.get(token, 0) < time.monotonic() or self.random.random() < self.unauthorized_rate:
+            self.injected["401"] += 1
+            return web.json_response({"code": 401, "msg": "unauthorized"}, status=401)
+
+        if endpoint not in ("key_list", "lock_history") and self.random.random() < self.busy_rate:
+            self.injected["busy"] += 1
+            key = "errcode" if endpoint in ("lock", "unlock") else "code"
+            return web.json_response({key: GATEWAY_BUSY, "msg": "gateway busy"})
+
+        return None
+
+    def _lock_from(self, request: web.Request):
+        try:
+            return self.locks.get(int(request.query.get("lockId", "")))
+        except ValueError:
+            return None
+
+    async def _login(self, request):
+        await self._respond(request, "login")
+        refresh_token = secrets.token_hex(8)
+        self.refresh_tokens.add(refresh_token)
+        return web.json_response({"code": 200, "data": {"token": secrets.token_hex(8), "refreshToken": refresh_token}})
+
+    async def _refresh(self, request):
+        await self._respond(request, "refresh")
+        if request.query.get("refresh_token") not in self.refresh_tokens:
+            return web.json_response({"code": 400, "msg": "invalid refresh token"})
+        token = secrets.token_hex(8)
+        self.tokens[token] = time.monotonic() + self.token_ttl
+        return web.json_response({"access_token": token, "refresh_token": request.query["refresh_token"], "expires_in": self.token_ttl})
+
+    async def _key_list(self, request):
+        if (error := await self._respond(request, "key_list")) is not None:
+            return error
+        page_no = int(request.query.get("pageNo", 1))
+        page_size = int(request.query.get("pageSize", 20))
+        locks = list(self.locks.values())
+        page = locks[(page_no - 1) * page_size:page_no * page_size]
+        return web.json_response({
+            "list": [{k: v for k, v in lock.items() if k != "state"} for lock in page],
+            "pageNo": page_no,
+            "pageSize": page_size,
+            "pages": -(-len(locks) // page_size),
+            "total": len(locks),
+        })
+
+    async def _detail(self, request):
+        if (error := await self._respond(request, "lock_detail")) is not None:
+            return error
+        lock = self._lock_from(request)
+        if not lock:
+            return web.json_response({"code": -1, "msg": "lock not found"})
+        return web.json_response({"code": 200, "data": {k: v for k, v in lock.items() if k != "state"}})
+
+    async def _gateways(self, request):
+        if (error := await self._respond(request, "lock_gateways")) is not None:
+            return error
+        lock = self._lock_from(request)
+        if not lock:
+            return web.json_response({"errcode": -1, "errmsg": "lock not found"})
+        return web.json_response({"list": self.gateways[lock["lockId"]]})
+
+    async def _state(self, request):
+        if (error := await self._respond(request, "query_state")) is not None:
+            return error
+        lock = self._lock_from(request)
+        if not lock:
+            return web.json_response({"code": -1, "msg": "lock not found"})
+        return web.json_response({"code": 200, "data": {"state": lock["state"]}})
+
+    async def _command(self, request, endpoint: str, state: int):
+        if (error := await self._respond(request, endpoint)) is not None:
+            return error
+        lock = self._lock_from(request)
+        if not lock:
+            return web.json_response({"errcode": -1, "errmsg": "lock not found"})
+        lock["state"] = state
+        records = self.add_history(lock["lockId"], record_type=11 if state == 0 else 1)
+        if self.callback_url:
+            asyncio.get_running_loop().create_task(send_lock_callback(self.callback_url, lock["lockId"], records))
+        return web.json_response({"errcode": 0, "errmsg": "none error message"})
+
+    async def _lock(self, request):
+        return await self._command(request, "lock", 0)
+
+    async def _unlock(self, request):
+        return await self._command(request, "unlock", 1)
+
+    async def _records(self, request):
+        if (error := await self._respond(request, "lock_history")) is not None:
+            return error
+        lock = self._lock_from(request)
+        records = self.history.get(lock["lockId"], []) if lock else []
+        page_no = int(request.query.get("pageNo", 1))
+        page_size = int(request.query.get("pageSize", 20))
+        return web.json_response({
+            "list": records[(page_no - 1) * page_size:page_no * page_size],
+            "pageNo": page_no,
+            "pageSize": page_size,
+            "total": len(records),
+        })
+
+
+async def send_lock_callback(url: str, lock_id: int, records: list[dict]) -> str:
+    """POST a lock-event callback the way the Sifely/TTLock cloud does and return the reply."""
+    form = {"lockId": str(lock_id), "notifyType": "1", "records": json.dumps(records)}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=form) as resp:
+            return await resp.text()
+
+
+async def _serve(args):
+    cloud = FakeSifelyCloud(
+        num_locks=args.locks,
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        busy_rate=args.busy_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        token_ttl=args.token_ttl,
+        callback_url=args.callback_url,
+    )
+    base_url = await cloud.start(port=args.port)
+    print(f"Fake Sifely cloud with {args.locks} locks listening on {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await cloud.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locks", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--busy-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=int, default=7200)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--callback-url", help="Push lock-event callbacks to this URL (e.g. an HA webhook)")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
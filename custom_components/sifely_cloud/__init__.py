@@ -5,21 +5,28 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .token_manager import SifelyTokenManager
+from .sifely_api import SifelyApiClient
+from .rate_limiter import get_rate_limiter
 from .sifely import setup_sifely_coordinator
+from .services import async_setup_services
+from .push import async_setup_push
 from .const import (
     DOMAIN,
+    API_BASE_URL,
     CONF_EMAIL,
     CONF_PASSWORD,
     CONF_CLIENT_ID,
     STARTUP_MESSAGE,
     SUPPORTED_PLATFORMS,
+    TOKEN_OPTION_KEYS,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
-    """Handle YAML setup (unused)."""
+    """Handle YAML setup (unused) and register the integration's services."""
+    async_setup_services(hass)
     return True
 
 
@@ -42,18 +49,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.info("🔐 Initializing Sifely token manager for client_id: %s", client_id)
 
     # Create and initialize token manager
-    session = async_get_clientsession(hass)
+    # Each entry (account) has its own client and token manager; the rate limit is shared per host
+    api = SifelyApiClient(async_get_clientsession(hass), rate_limiter=get_rate_limiter(hass, API_BASE_URL))
     token_manager = SifelyTokenManager(
         client_id=client_id,
         email=email,
         password=password,
-        session=session,
+        api=api,
         hass=hass,
         config_entry=entry,
     )
 
     try:
-        await token_manager.initialize()
         coordinator = await setup_sifely_coordinator(hass, token_manager, entry)
         _LOGGER.info("✅ Sifely token manager and coordinator initialized successfully.")
     except Exception as e:
@@ -64,8 +71,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     hass.data[DOMAIN][entry.entry_id] = {
         "token_manager": token_manager,
         "coordinator": coordinator,
+        "user_options": _user_options(entry),
     }
 
+    # 📬 Accept lock-event callbacks if push mode is enabled
+    await async_setup_push(hass, entry, coordinator)
+
     # ✅ Listen for config option updates
     entry.async_on_unload(entry.add_update_listener(options_update_listener))
 
@@ -75,8 +86,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     return True
 
 
+def _user_options(entry: ConfigEntry) -> dict:
+    """Return the entry's options without the tokens the token manager saves there."""
+    return {key: value for key, value in entry.options.items() if key not in TOKEN_OPTION_KEYS}
+
+
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Handle options update by reloading the config entry."""
+    """Handle options update by reloading the config entry.
+
+    Saving a refreshed token (or the webhook ID) also updates the entry; those
+    updates don't change the user's options and don't reload it.
+    """
+    data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id, {})
+    if data.get("user_options") == _user_options(config_entry):
+        return
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
@@ -94,6 +117,12 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     if unload_ok:
         data = hass.data[DOMAIN].pop(entry.entry_id, {})
+        coordinator = data.get("coordinator")
+        if coordinator:
+            coordinator.scheduler.async_stop()
+            coordinator.command_queue.async_stop()
+            coordinator.cancel_history_fetches()
+            await coordinator.async_close_history_store()
         token_manager = data.get("token_manager")
         if token_manager:
             await token_manager.async_shutdown()
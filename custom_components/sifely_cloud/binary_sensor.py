@@ -2,7 +2,8 @@ import logging
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
@@ -21,6 +22,10 @@ def create_binary_sensors(locks, coordinator):
     return entities
 
 class BaseSifelyBinarySensor(BinarySensorEntity):
+    """Binary sensor driven by a flag in the coordinator's lock details."""
+
+    _detail_key: str
+
     def __init__(self, lock, coordinator):
         self.coordinator = coordinator
         self.lock_id = lock.get("lockId")
@@ -28,43 +33,57 @@ class BaseSifelyBinarySensor(BinarySensorEntity):
         slug = slugify(alias)
 
         self._attr_device_info = async_register_lock_device(lock)
+        self._attr_should_poll = False
         self.slug = slug
         self.alias = alias
-
-    def update_state(self):
-        raise NotImplementedError
-
-    async def async_update(self):
         self.update_state()
 
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Flag values that may be out of date: restored from the startup snapshot, or kept while the cloud is unreachable."""
+        return {"is_stale": self.coordinator.is_stale}
+
+    def update_state(self) -> bool:
+        """Read the flag from details_data. Returns True if the state changed."""
+        is_on = self.coordinator.details_data.get(self.lock_id, {}).get(self._detail_key) == 1
+        if is_on == self._attr_is_on:
+            return False
+        self._attr_is_on = is_on
+        return True
+
+    async def async_added_to_hass(self):
+        """Subscribe to detail updates for this lock."""
+        self.async_on_remove(self.coordinator.async_add_listener(self._handle_details_update))
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self.coordinator.lock_signal(self.lock_id), self._handle_details_update)
+        )
+
+    @callback
+    def _handle_details_update(self):
+        """Write state only when the flag actually changed."""
+        if self.update_state():
+            self.async_write_ha_state()
+        else:
+            self.coordinator.suppressed_writes += 1
+
 class SifelyPrivacyLockSensor(BaseSifelyBinarySensor):
+    _detail_key = "privacyLock"
+
     def __init__(self, lock, coordinator):
         super().__init__(lock, coordinator)
         self._attr_name = f"{ENTITY_PREFIX} Privacy Mode {self.alias}"
         self._attr_unique_id = f"{ENTITY_PREFIX}_privacy_{self.slug}_{self.lock_id}"
         self._attr_icon = "mdi:shield-lock"
 
-    @property
-    def is_on(self):
-        return self.coordinator.details_data.get(self.lock_id, {}).get("privacyLock") == 1
-
-    def update_state(self):
-        self._attr_is_on = self.is_on
-
 class SifelyTamperAlertSensor(BaseSifelyBinarySensor):
+    _detail_key = "tamperAlert"
+
     def __init__(self, lock, coordinator):
         super().__init__(lock, coordinator)
         self._attr_name = f"{ENTITY_PREFIX} Tamper Alert {self.alias}"
         self._attr_unique_id = f"{ENTITY_PREFIX}_tamper_{self.slug}_{self.lock_id}"
         self._attr_icon = "mdi:alert-octagram"
 
-    @property
-    def is_on(self):
-        return self.coordinator.details_data.get(self.lock_id, {}).get("tamperAlert") == 1
-
-    def update_state(self):
-        self._attr_is_on = self.is_on
-
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -72,7 +91,7 @@ async def async_setup_entry(
 ):
     _LOGGER.info("📟 Setting up Sifely binary sensors")
 
-    coordinator = hass.data[DOMAIN].get("coordinator")
+    coordinator = hass.data[DOMAIN].get(config_entry.entry_id, {}).get("coordinator")
     if not coordinator:
         _LOGGER.warning("⚠️ Coordinator not found.")
         return
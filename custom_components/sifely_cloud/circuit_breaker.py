@@ -0,0 +1,100 @@
+import logging
+import time
+
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_PROBE_INTERVAL,
+    CIRCUIT_PROBE_MAX_INTERVAL,
+    CIRCUIT_PROBE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class SifelyCircuitBreaker:
+    """Stops requests to the Sifely cloud while it is unreachable.
+
+    After CIRCUIT_FAILURE_THRESHOLD consecutive failures (transport errors,
+    timeouts, 5xx) the circuit opens and requests fail fast. Once a probe is
+    due, a single request is let through (half-open): success closes the
+    circuit, failure re-opens it with the probe interval doubled (up to
+    CIRCUIT_PROBE_MAX_INTERVAL). A probe that never reports back (cancelled,
+    or failed with an unexpected error) counts as failed after
+    CIRCUIT_PROBE_TIMEOUT. on_change(state) is called when the circuit opens
+    and when it closes again.
+    """
+
+    def __init__(self, threshold: int = CIRCUIT_FAILURE_THRESHOLD):
+        self.threshold = threshold
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._probe_interval = CIRCUIT_PROBE_INTERVAL
+        self._next_probe = 0.0
+        self._probe_started = 0.0
+        self.on_change = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != STATE_CLOSED
+
+    def probe_due(self) -> bool:
+        """Return True if the circuit is open and a probe request may be sent."""
+        if self.state == STATE_HALF_OPEN and time.monotonic() - self._probe_started >= CIRCUIT_PROBE_TIMEOUT:
+            _LOGGER.debug("🔌 Probe never reported back, counting it as failed")
+            self.record_failure()
+        return self.state == STATE_OPEN and time.monotonic() >= self._next_probe
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent; an allowed request while open is the probe."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.probe_due():
+            self._probe_started = time.monotonic()
+            self._set_state(STATE_HALF_OPEN)
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != STATE_CLOSED:
+            self._probe_interval = CIRCUIT_PROBE_INTERVAL
+            self._set_state(STATE_CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN:
+            self._probe_interval = min(self._probe_interval * 2, CIRCUIT_PROBE_MAX_INTERVAL)
+            self._open()
+        elif self.state == STATE_CLOSED and self.failures >= self.threshold:
+            self.opened += 1
+            self._open()
+
+    def _open(self):
+        self._next_probe = time.monotonic() + self._probe_interval
+        self._set_state(STATE_OPEN)
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        _LOGGER.debug("🔌 Circuit %s -> %s", previous, state)
+        # Probes going back and forth between open and half-open aren't reported
+        if self.on_change and STATE_CLOSED in (previous, state):
+            self.on_change(state)
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.opened,
+            "rejected_requests": self.rejected,
+            "probe_interval": self._probe_interval,
+            "next_probe_in": max(0.0, round(self._next_probe - time.monotonic(), 1)) if self.state == STATE_OPEN else None,
+        }
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from collections import deque
+
+from homeassistant.core import HomeAssistant
+
+from .const import METRICS_LATENCY_SAMPLES
+from .metrics import percentile
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SifelyCommandQueue:
+    """Serializes lock/unlock commands per lock.
+
+    Each lock has at most one command running and one waiting. A command that
+    repeats the waiting (or, with nothing waiting, the running) intent shares
+    its result instead of being queued again; a different command replaces the
+    waiting one, so the latest intent wins. Callers whose command was replaced
+    get None instead of True/False. A command may bring its own execute
+    function (e.g. a bulk command confirmed in shared sweeps).
+    """
+
+    def __init__(self, hass: HomeAssistant, execute):
+        self.hass = hass
+        self._execute = execute  # async (lock_id, lock) -> bool
+        self._running = {}
+        self._pending = {}
+        self._workers = {}
+        self.submitted = 0
+        self.collapsed = 0
+        self.superseded = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=METRICS_LATENCY_SAMPLES)
+
+    def depth(self, lock_id=None) -> int:
+        """Return the number of running and waiting commands (for one lock, or all)."""
+        if lock_id is not None:
+            return (lock_id in self._running) + (lock_id in self._pending)
+        return len(self._running) + len(self._pending)
+
+    def pending_intent(self, lock_id) -> bool | None:
+        """Return the waiting command for a lock (True = lock), or None."""
+        pending = self._pending.get(lock_id)
+        return pending[0] if pending else None
+
+    async def async_submit(self, lock_id, lock: bool, execute=None) -> bool | None:
+        """Queue a command (run with execute, or the queue's default) and wait for its result."""
+        started = self.hass.loop.time()
+        self.submitted += 1
+        pending = self._pending.get(lock_id)
+        running = self._running.get(lock_id)
+
+        if pending is not None and pending[0] == lock:
+            self.collapsed += 1
+            future = pending[1]
+        elif pending is None and running is not None and running[0] == lock:
+            self.collapsed += 1
+            future = running[1]
+        else:
+            if pending is not None:
+                self.superseded += 1
+                _LOGGER.debug("🔀 Replacing queued %s of lock %s with the latest command", "lock" if pending[0] else "unlock", lock_id)
+                pending[1].set_result(None)
+            future = self.hass.loop.create_future()
+            self._pending[lock_id] = (lock, future, execute or self._execute)
+
+        if lock_id not in self._workers:
+            self._workers[lock_id] = self.hass.async_create_background_task(
+                self._async_worker(lock_id), f"sifely_cloud_command_{lock_id}"
+            )
+
+        # Shielded so one caller giving up doesn't cancel the result for the others
+        result = await asyncio.shield(future)
+        self.latencies.append(round((self.hass.loop.time() - started) * 1000, 1))
+        return result
+
+    async def _async_worker(self, lock_id):
+        """Run the commands of one lock in order until none are waiting."""
+        try:
+            while (item := self._pending.pop(lock_id, None)) is not None:
+                lock, future, execute = item
+                self._running[lock_id] = item
+                try:
+                    result = await execute(lock_id, lock)
+                except Exception as e:
+                    _LOGGER.warning("⚠️ Command for lock %s failed: %s", lock_id, e)
+                    result = False
+                finally:
+                    self._running.pop(lock_id, None)
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._workers.pop(lock_id, None)
+
+    def async_stop(self):
+        """Cancel queued and running commands."""
+        for _, future, _ in list(self._pending.values()) + list(self._running.values()):
+            if not future.done():
+                future.cancel()
+        for task in self._workers.values():
+            task.cancel()
+        self._pending.clear()
+
+    def as_dict(self) -> dict:
+        samples = sorted(self.latencies)
+        return {
+            "depth": self.depth(),
+            "depth_by_lock": {str(lock_id): self.depth(lock_id) for lock_id in set(self._running) | set(self._pending)},
+            "submitted": self.submitted,
+            "collapsed": self.collapsed,
+            "superseded": self.superseded,
+            "retries": self.retries,
+            "latency_p50_ms": percentile(samples, 50),
+            "latency_p95_ms": percentile(samples, 95),
+        }
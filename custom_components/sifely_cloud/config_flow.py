@@ -11,6 +11,7 @@ from .const import (
     CONF_CLIENT_ID,
     CONF_APX_NUM_LOCKS,
     CONF_HISTORY_ENTRIES,
+    CONF_PUSH_ENABLED,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -24,10 +25,11 @@ class SifelyCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input=None) -> FlowResult:
         errors = {}
 
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
-
         if user_input is not None:
+            # One entry per Sifely account; several accounts can be added side by side
+            await self.async_set_unique_id(f"{user_input[CONF_CLIENT_ID]}_{user_input[CONF_EMAIL]}".lower())
+            self._abort_if_unique_id_configured()
+
             # Validate and create entry
             return self.async_create_entry(
                 title=user_input[CONF_EMAIL],
@@ -46,6 +48,7 @@ class SifelyCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_CLIENT_ID, default=user_input.get(CONF_CLIENT_ID, "")): str,
                 vol.Required(CONF_APX_NUM_LOCKS, default=user_input.get(CONF_APX_NUM_LOCKS, 5)): vol.In([5, 10, 15, 20, 25, 30, 35, 40, 45, 50]),
                 vol.Optional(CONF_HISTORY_ENTRIES, default=user_input.get(CONF_HISTORY_ENTRIES, 20)): vol.In([10, 20, 30, 40,  50, 60, 70, 80, 90, 100]),
+                vol.Optional(CONF_PUSH_ENABLED, default=user_input.get(CONF_PUSH_ENABLED, False)): bool,
             }),
             errors=errors
         )
@@ -84,6 +87,7 @@ class SifelyCloudOptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required(CONF_CLIENT_ID, default=default(CONF_CLIENT_ID)): str,
                 vol.Required(CONF_APX_NUM_LOCKS, default=default(CONF_APX_NUM_LOCKS, 5)): vol.In([5, 10, 15, 20, 25, 30, 35, 40, 45, 50]),
                 vol.Optional(CONF_HISTORY_ENTRIES, default=default(CONF_HISTORY_ENTRIES, 20)): vol.In([10, 20, 30, 40,  50, 60, 70, 80, 90, 100]),
+                vol.Optional(CONF_PUSH_ENABLED, default=default(CONF_PUSH_ENABLED, False)): bool,
             }),
         )
 
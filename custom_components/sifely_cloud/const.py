@@ -12,20 +12,67 @@ ISSUE_URL = "https://github.com/kenster1965/sifely_cloud/issues"
 CONF_EMAIL = "User_Email"#
 CONF_PASSWORD = "User_Password"
 CONF_CLIENT_ID = "clientId"
-CONF_APX_NUM_LOCKS = "apxNumLocks" # Approximate number of locks
+CONF_APX_NUM_LOCKS = "apxNumLocks" # Approximate number of locks (lock list page size)
 CONF_HISTORY_ENTRIES = "history_entries"  # Number of history records to keep
+CONF_PUSH_ENABLED = "push_enabled"  # Accept Sifely/TTLock lock-event callbacks on a webhook
+CONF_WEBHOOK_ID = "webhook_id"  # Generated webhook ID, kept in the entry data
+TOKEN_OPTION_KEYS = ("access_token", "refresh_token", "token_expiry", "login_token")  # Saved by the token manager, not set by the user
 
 
 # Polling Intervals (in seconds)
 DETAILS_UPDATE_INTERVAL = 300    # e.g., 5 minutes for Lock details
 STATE_QUERY_INTERVAL = 60        # e.g., 60 seconds for Lock state
-HISTORY_INTERVAL = 3600          # e.g., 1 hour for Lock history
+HISTORY_INTERVAL = 21600         # e.g., 6 hours for the full Lock history safety-net sweep
+HISTORY_FETCH_DEBOUNCE = 10      # Delay before fetching a lock's history after its state flips
+PUSH_RECONCILE_INTERVAL = 1800   # Per-lock state poll once push callbacks are arriving
+PUSH_ACTIVE_WINDOW = 7200        # Go back to adaptive polling if no callback arrived for this long
+JOB_START_JITTER = 5             # Max random delay before each scheduled job run
+SNAPSHOT_SAVE_DELAY = 30         # Delay before persisting the coordinator snapshot after a sweep
 
-HISTORY_DISPLAY_LIMIT = 20  # Limit for history fetching, max possible history records in for HISTORY_INTERVAL time
+# Adaptive open-state polling (in seconds). Each lock starts at STATE_QUERY_INTERVAL,
+# drops to the floor after activity, and backs off towards the ceiling while idle.
+ADAPTIVE_POLL_FLOOR = 10         # Fastest per-lock poll right after a change or command
+ADAPTIVE_POLL_CEILING = 600      # Slowest per-lock poll for idle locks
+ADAPTIVE_POLL_BACKOFF = 2        # Multiplier applied to the interval after each unchanged poll
+
+KEYLIST_MAX_PAGES = 50  # Max lock list pages fetched during discovery (a warning is logged if there are more)
+KEYLIST_PAGE_SIZE = 100  # Page size used once the first page (sized by apxNumLocks) doesn't hold every lock
+HISTORY_DISPLAY_LIMIT = 20  # Page size for history fetching
+HISTORY_PROBE_SIZE = 5  # Page size used to check a lock for new history past its high-water mark
+HISTORY_MAX_PAGES = 10  # Max history pages fetched per lock per sync
 LOCK_REQUEST_RETRIES = 3  # Number of retries for lock/unlock requests
+COMMAND_VERIFY_ATTEMPTS = 5  # Open-state polls of the target lock to confirm a lock/unlock command
+COMMAND_VERIFY_INTERVAL = 2  # Delay (in seconds) before each confirmation poll
+COMMAND_RETRY_BACKOFF = 1  # Initial delay (in seconds) between lock/unlock retries, doubled each retry
+COMMAND_RETRY_MAX_BACKOFF = 16  # Cap (in seconds) for the delay between lock/unlock retries
 TOKEN_REFRESH_BUFFER_MINUTES = 5 # Buffer time to refresh token early (before actual expiration)
+TOKEN_REFRESH_RETRIES = 5  # Max login/refresh attempts per token refresh
+TOKEN_REFRESH_BACKOFF = 2  # Initial delay (in seconds) between refresh attempts, doubled each retry
+TOKEN_REFRESH_MAX_BACKOFF = 60  # Cap (in seconds) for the delay between refresh attempts
 TOKEN_401s_BEFORE_REAUTH = 5  # Number of 401 errors before re-authentication
 TOKEN_401s_BEFOR_ALERT = 10  # Number of 401 errors before alerting user
+RATE_LIMIT_PER_SECOND = 10  # Requests per second to a cloud host, shared by all configured accounts
+RATE_LIMIT_BURST = 20  # Requests that may be sent at once before RATE_LIMIT_PER_SECOND applies
+RATE_LIMIT_MIN_PER_SECOND = 0.5  # Floor for the request rate after the cloud pushes back
+RATE_LIMIT_BACKOFF = 0.5  # Multiplier applied to the request rate on HTTP 429 or -3003
+RATE_LIMIT_PENALTY_COOLDOWN = 2  # Seconds during which further 429/-3003 answers don't cut the rate again
+RATE_LIMIT_RECOVERY_DELAY = 30  # Seconds without 429/-3003 before the request rate starts recovering
+RATE_LIMIT_RECOVERY_STEP = 0.1  # Requests/s regained per second while recovering
+MAX_CONCURRENT_REQUESTS = 8  # Max per-lock requests in flight during a polling sweep (1 = serial)
+REQUEST_TIMEOUT = 15  # Per-request timeout (in seconds) for Sifely cloud requests
+GATEWAY_BUSY_RETRIES = 3  # Retries within a sweep for a lock whose gateway answered -3003 (busy)
+GATEWAY_BUSY_BACKOFF = 2  # Initial delay (in seconds) before retrying a busy gateway, doubled each retry
+# Fallback lock detail fields naming a lock's gateway, used only when the gateway list can't be fetched.
+# Not confirmed to be present in Sifely's /v3/lock/detail payload.
+GATEWAY_ID_KEYS = ("gatewayId",)
+API_REQUEST_RETRIES = 1  # Retries for transport errors, timeouts and 5xx responses (not lock commands)
+API_RETRY_BACKOFF = 1  # Initial delay (in seconds) between request retries, doubled each retry
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failed requests (timeouts, transport errors, 5xx) before the circuit opens
+CIRCUIT_PROBE_INTERVAL = 30  # Delay (in seconds) before the first probe request while the circuit is open, doubled per failed probe
+CIRCUIT_PROBE_MAX_INTERVAL = 300  # Cap (in seconds) for the delay between probe requests
+CIRCUIT_PROBE_TIMEOUT = 120  # A probe that hasn't reported back after this many seconds counts as failed
+CIRCUIT_RAMP_UP = 60  # Seconds over which per-lock polls are spread out after the circuit closes
+METRICS_LATENCY_SAMPLES = 500  # Rolling window of latency samples kept per endpoint
 
 
 # API endpoints
@@ -38,6 +85,7 @@ QUERY_STATE_ENDPOINT = f"{API_BASE_URL}/v3/lock/queryOpenState"
 UNLOCK_ENDPOINT = f"{API_BASE_URL}/v3/lock/unlock"
 LOCK_ENDPOINT = f"{API_BASE_URL}/v3/lock/lock"
 LOCK_HISTORY_ENDPOINT = f"{API_BASE_URL}/v3/lockRecord/list"
+LOCK_GATEWAYS_ENDPOINT = f"{API_BASE_URL}/v3/gateway/listByLock"  # Gateways a lock is paired with (TTLock v3 API)
 
 # Mapping of record types to human-readable names
 # This is used for displaying history records in a user-friendly way
@@ -53,6 +101,10 @@ HISTORY_RECORD_TYPES = {
     55: "Remote",
 }
 
+# Callback record types that leave a lock locked or unlocked (Sifely/TTLock recordType)
+PUSH_LOCKED_RECORD_TYPES = {11, 33, 34, 35, 36, 45, 47}
+PUSH_UNLOCKED_RECORD_TYPES = {1, 4, 7, 8, 9, 10, 12, 17, 32, 46, 55, -4, -5}
+
 # Valid HA entity categories
 VALID_ENTITY_CATEGORIES = {
     "config",  "diagnostic",
@@ -63,6 +115,25 @@ VALID_SENSOR_CLASSES = {
     "illuminance", "signal_strength", "battery", "timestamp",
 }
 
+# Endpoints exposed as diagnostic latency sensors
+METRICS_SENSOR_ENDPOINTS = ["key_list", "lock_detail", "query_state", "lock", "unlock", "lock_history"]
+
+# Rate limiter priorities (lower values are served first)
+PRIORITY_COMMAND = 0  # Lock/unlock commands and token requests
+PRIORITY_STATE = 1  # Open-state polls
+PRIORITY_BACKGROUND = 2  # Lock list, details and history
+
+# hass.data key for the per-host rate limiters shared across config entries
+DATA_RATE_LIMITERS = f"{DOMAIN}_rate_limiters"
+
+# Dispatcher signals, formatted with (entry_id, lock_id)
+SIGNAL_LOCK_UPDATED = f"{DOMAIN}_lock_updated_{{}}_{{}}"
+SIGNAL_HISTORY_UPDATED = f"{DOMAIN}_history_updated_{{}}_{{}}"
+SIGNAL_CLOUD_ERROR = f"{DOMAIN}_cloud_error_{{}}_{{}}"
+
+# Event fired on the HA bus when a lock's polled state flips
+EVENT_LOCK_TRANSITION = f"{DOMAIN}_lock_transition"
+
 # Supported platforms
 SUPPORTED_PLATFORMS = {"lock", "sensor", "binary_sensor"}
 
@@ -0,0 +1,37 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_EMAIL, CONF_PASSWORD, CONF_CLIENT_ID
+
+TO_REDACT = {
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_CLIENT_ID,
+    "access_token",
+    "refresh_token",
+    "login_token",
+    "webhook_id",
+}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry, including cloud API metrics."""
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+    coordinator = data.get("coordinator")
+
+    diagnostics = {
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+    }
+    if coordinator:
+        diagnostics.update({
+            "lock_count": len(coordinator.lock_list),
+            "api_metrics": coordinator.api.metrics.as_dict(),
+            "scheduler": coordinator.scheduler.stats,
+            "command_queue": coordinator.command_queue.as_dict(),
+            "suppressed_writes": coordinator.suppressed_writes,
+            "circuit_breaker": coordinator.api.breaker.as_dict(),
+            "rate_limiter": coordinator.api.rate_limiter.as_dict() if coordinator.api.rate_limiter else None,
+            "push": {"active": coordinator.push_active, "received": coordinator.pushes_received},
+        })
+    return diagnostics
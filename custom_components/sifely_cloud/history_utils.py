@@ -1,19 +1,43 @@
 import os
 import csv
+import logging
+import sqlite3
+import threading
 from datetime import datetime, timezone
 
-from .const import CONF_HISTORY_ENTRIES, HISTORY_RECORD_TYPES
+from .const import (
+    CONF_HISTORY_ENTRIES,
+    HISTORY_DISPLAY_LIMIT,
+    HISTORY_MAX_PAGES,
+    HISTORY_PROBE_SIZE,
+    HISTORY_RECORD_TYPES,
+)
+
+_LOGGER = logging.getLogger(__name__)
 
 HISTORY_FOLDER = "history"
+HISTORY_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+HISTORY_SCHEMA_VERSION = 2
 
 
-def get_history_path(lock_id: int) -> str:
-    """Return full CSV path for the given lock_id inside the component's folder."""
+def get_history_dir() -> str:
+    """Return the history folder inside the component's folder, creating it if needed."""
     base_dir = os.path.dirname(__file__)
     history_dir = os.path.join(base_dir, HISTORY_FOLDER)
     os.makedirs(history_dir, exist_ok=True)  # Make sure it exists
 
-    return os.path.join(history_dir, f"history_{lock_id}.csv")
+    return history_dir
+
+
+def get_history_path(lock_id: int) -> str:
+    """Return full legacy CSV path for the given lock_id inside the component's folder."""
+    return os.path.join(get_history_dir(), f"history_{lock_id}.csv")
+
+
+def get_history_db_path(entry_id: str) -> str:
+    """Return the SQLite history database path for a config entry."""
+    return os.path.join(get_history_dir(), f"history_{entry_id}.db")
+
 
 def read_csv(path: str):
     """Read and parse existing CSV history file."""
@@ -30,56 +54,256 @@ def read_csv(path: str):
     return seen_ids, existing_rows
 
 
-def write_csv(path: str, rows: list[dict]):
-    """Write lock history entries to CSV."""
-    with open(path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=["recordId", "lockDate", "username", "recordType", "success"])
-        writer.writeheader()
-        writer.writerows(rows)
+class SifelyHistoryStore:
+    """Append-only SQLite store for lock history, one database per config entry.
 
+    Records are keyed by (lock_id, record_id) so re-inserting a record is a no-op,
+    and indexed by (lock_id, lock_date) so "latest N for a lock" and retention
+    are range operations rather than full scans. All methods are blocking and
+    must be run in the executor.
+    """
 
-async def fetch_and_update_lock_history(coordinator, lock_id: int):
-    """Fetch and persist new lock history entries for a given lock."""
-    new_entries = await coordinator.async_query_lock_history(lock_id)
-    if not new_entries:
-        return []
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Open the database and create or upgrade the schema."""
+        with self._lock:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS history (
+                    lock_id INTEGER NOT NULL,
+                    record_id TEXT NOT NULL,
+                    lock_date INTEGER NOT NULL,
+                    username TEXT,
+                    record_type TEXT,
+                    success TEXT,
+                    PRIMARY KEY (lock_id, record_id)
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_history_lock_date ON history (lock_id, lock_date)"
+            )
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 2:
+                # Records stored from push callbacks don't count towards the high-water mark
+                self._conn.execute("ALTER TABLE history ADD COLUMN pushed INTEGER NOT NULL DEFAULT 0")
+            if version < HISTORY_SCHEMA_VERSION:
+                self._conn.execute(f"PRAGMA user_version = {HISTORY_SCHEMA_VERSION}")
+            self._conn.commit()
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+    def migrate_csv(self, lock_ids: list) -> int:
+        """Import the legacy history_<lockId>.csv files of the given locks, then rename them.
+
+        The CSV files of every account share one folder, so each entry only
+        imports its own locks. Returns the number of files migrated.
+        """
+        migrated = 0
+        with self._lock:
+            for lock_id in lock_ids:
+                path = os.path.join(os.path.dirname(self.path), f"history_{lock_id}.csv")
+                if not os.path.exists(path):
+                    continue
+
+                _, rows = read_csv(path)
+                records = []
+                for row in rows:
+                    try:
+                        dt = datetime.strptime(row["lockDate"], HISTORY_TIME_FORMAT).astimezone()
+                    except (KeyError, ValueError):
+                        continue
+                    records.append((
+                        int(lock_id),
+                        row["recordId"],
+                        int(dt.timestamp() * 1000),
+                        row.get("username"),
+                        row.get("recordType"),
+                        row.get("success"),
+                    ))
+
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO history (lock_id, record_id, lock_date, username, record_type, success) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    records,
+                )
+                self._conn.commit()
+                os.replace(path, f"{path}.migrated")
+                migrated += 1
+                _LOGGER.info("📦 Migrated %d history records from %s", len(records), lock_id)
+        return migrated
+
+    def append(self, lock_id: int, rows: list[dict], pushed: bool = False) -> int:
+        """Append raw API history records for a lock. Returns the number inserted.
 
-    path = get_history_path(lock_id)
-    os.makedirs(HISTORY_FOLDER, exist_ok=True)
+        Records from push callbacks are flagged so marks() ignores them until the
+        same records come back from a cloud fetch.
+        """
+        records = []
+        for row in rows:
+            record_type_code = row.get("recordType")
+            records.append((
+                lock_id,
+                str(row.get("recordId")),
+                row.get("lockDate") or 0,
+                row.get("username", "Unknown"),
+                HISTORY_RECORD_TYPES.get(record_type_code, f"Type {record_type_code}"),
+                "Success" if row.get("success", -1) == 1 else "Failed",
+                int(pushed),
+            ))
 
-    seen_ids, existing_rows = await coordinator.hass.async_add_executor_job(read_csv, path)
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO history (lock_id, record_id, lock_date, username, record_type, success, pushed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            inserted = self._conn.total_changes - before
+            if not pushed:
+                self._conn.executemany(
+                    "UPDATE history SET pushed = 0 WHERE lock_id = ? AND record_id = ? AND pushed = 1",
+                    [(record[0], record[1]) for record in records],
+                )
+            self._conn.commit()
+            return inserted
 
-    fresh_rows = []
-    for row in new_entries:
-        record_id = str(row.get("recordId"))
-        if record_id in seen_ids:
-            continue
+    def latest(self, lock_id: int, limit: int) -> list[dict]:
+        """Return the newest `limit` records for a lock, newest first."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT record_id, lock_date, username, record_type, success FROM history "
+                "WHERE lock_id = ? ORDER BY lock_date DESC LIMIT ?",
+                (lock_id, limit),
+            )
+            rows = cursor.fetchall()
 
-        ts = row.get("lockDate")
-        dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).astimezone()
-        formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
+        return [
+            {
+                "recordId": record_id,
+                "lockDate": datetime.fromtimestamp(lock_date / 1000, tz=timezone.utc).astimezone().strftime(HISTORY_TIME_FORMAT),
+                "username": username,
+                "recordType": record_type,
+                "success": success,
+            }
+            for record_id, lock_date, username, record_type, success in rows
+        ]
+
+    def marks(self) -> dict:
+        """Return the newest fetched recordId/lockDate per lock (the history high-water marks).
+
+        Pushed records are left out: a callback may have been missed before them,
+        and only a cloud fetch can fill that gap.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT lock_id, record_id, MAX(lock_date) FROM history WHERE pushed = 0 GROUP BY lock_id"
+            )
+            return {
+                lock_id: {"recordId": record_id, "lockDate": lock_date}
+                for lock_id, record_id, lock_date in cursor.fetchall()
+            }
+
+    def trim(self, lock_id: int, keep: int):
+        """Delete all but the newest `keep` records of a lock with one range delete."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lock_date FROM history WHERE lock_id = ? ORDER BY lock_date DESC LIMIT 1 OFFSET ?",
+                (lock_id, keep - 1),
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    "DELETE FROM history WHERE lock_id = ? AND lock_date < ?",
+                    (lock_id, row[0]),
+                )
+                self._conn.commit()
+
+
+def _is_at_or_past_mark(row: dict, mark: dict) -> bool:
+    """Return True if a history record was already seen according to the mark."""
+    if str(row.get("recordId")) == str(mark.get("recordId")):
+        return True
+    return (row.get("lockDate") or 0) < (mark.get("lockDate") or 0)
+
+
+async def fetch_new_lock_history(coordinator, lock_id: int) -> list[dict]:
+    """Fetch history records newer than the lock's high-water mark, newest first.
+
+    Without a mark only the first page is fetched. With a mark, a small probe page
+    is requested first; if the mark isn't on it, full pages are walked until the
+    mark (or HISTORY_MAX_PAGES) is reached so busy locks don't drop records.
+    """
+    mark = coordinator.history_marks.get(lock_id)
+    if not mark:
+        return await coordinator.async_query_lock_history(lock_id)
+
+    probe = await coordinator.async_query_lock_history(lock_id, page_size=HISTORY_PROBE_SIZE)
+    new_rows = []
+    for row in probe:
+        if _is_at_or_past_mark(row, mark):
+            return new_rows
+        new_rows.append(row)
+    if len(probe) < HISTORY_PROBE_SIZE:
+        return new_rows
+
+    new_rows = []
+    for page_no in range(1, HISTORY_MAX_PAGES + 1):
+        page = await coordinator.async_query_lock_history(lock_id, page_no=page_no)
+        for row in page:
+            if _is_at_or_past_mark(row, mark):
+                return new_rows
+            new_rows.append(row)
+        if len(page) < HISTORY_DISPLAY_LIMIT:
+            break
+
+    return new_rows
+
+
+async def fetch_and_update_lock_history(coordinator, lock_id: int):
+    """Fetch and persist new lock history entries for a given lock."""
+    hass = coordinator.hass
+    store = coordinator.history_store
+    limit = coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
+    new_entries = await fetch_new_lock_history(coordinator, lock_id)
+
+    if not new_entries:
+        cached = coordinator.history_cache.get(lock_id)
+        if cached is None:
+            cached = await hass.async_add_executor_job(store.latest, lock_id, limit)
+            coordinator.history_cache[lock_id] = cached
+        return cached
 
-        record_type_code = row.get("recordType")
-        record_type = HISTORY_RECORD_TYPES.get(record_type_code, f"Type {record_type_code}")
-        username = row.get("username", "Unknown")
-        success = "Success" if row.get("success", -1) == 1 else "Failed"
+    rows = await store_lock_history(coordinator, lock_id, new_entries)
+    coordinator.update_history_mark(lock_id, max(new_entries, key=lambda r: r.get("lockDate") or 0))
+    return rows
 
-        fresh_rows.append({
-            "recordId": record_id,
-            "lockDate": formatted_time,
-            "username": username,
-            "recordType": record_type,
-            "success": success,
-        })
 
-    if fresh_rows:
-        existing_rows.extend(fresh_rows)
-        existing_rows = sorted(existing_rows, key=lambda r: r["recordId"], reverse=True)
+async def store_lock_history(coordinator, lock_id: int, new_entries: list[dict], pushed: bool = False):
+    """Persist raw history records for a lock and return its latest entries.
 
-        limit = coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
-        trimmed = existing_rows[:limit]
+    Used for records fetched from the cloud and for records pushed to the webhook.
+    The high-water mark is left to the caller. Pushed records (pushed=True) don't
+    advance it, in memory or in the database (see SifelyHistoryStore.marks), so a
+    later fetch still picks up anything a missed callback skipped, even after a restart.
+    """
+    store = coordinator.history_store
+    limit = coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
 
-        await coordinator.hass.async_add_executor_job(write_csv, path, trimmed)
-        return trimmed
+    def _append_and_trim():
+        inserted = store.append(lock_id, new_entries, pushed)
+        if inserted:
+            store.trim(lock_id, limit)
+        return store.latest(lock_id, limit)
 
-    return existing_rows[:coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)]
+    rows = await coordinator.hass.async_add_executor_job(_append_and_trim)
+    coordinator.history_cache[lock_id] = rows
+    return rows
@@ -2,7 +2,9 @@ import logging
 
 from homeassistant.components.lock import LockEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import slugify
@@ -34,19 +36,21 @@ class SifelySmartLock(LockEntity):
         alias = lock_data.get("lockAlias", "Sifely Lock")
         slug = slugify(alias)
         lock_id = lock_data.get("lockId")
+        self.lock_id = lock_id
 
         self._attr_name = f"{ENTITY_PREFIX}_{slug}"
         self._attr_unique_id = f"{ENTITY_PREFIX}_{slug}_{lock_id}" if lock_id else None
         self._attr_device_info = async_register_lock_device(lock_data)
+        # Updates are pushed by the coordinator only when this lock's data changes
+        self._attr_should_poll = False
 
     @property
     def is_locked(self) -> bool | None:
         """Return True if locked, False if unlocked, None if unknown."""
-        lock_id = self.lock_data.get("lockId")
-        if lock_id is None:
+        if self.lock_id is None:
             return None
 
-        state = self.coordinator.open_state_data.get(lock_id)
+        state = self.coordinator.open_state_data.get(self.lock_id)
 
         # Sifely: 0 = locked, 1 = unlocked
         if state == 0:
@@ -57,48 +61,51 @@ class SifelySmartLock(LockEntity):
 
     async def async_lock(self, **kwargs):
         """Send lock command to the device."""
-        lock_id = self.lock_data.get("lockId")
+        lock_id = self.lock_id
         if not lock_id:
             _LOGGER.warning("🔒 Cannot lock: Missing lockId")
             return
 
         _LOGGER.info("🔒 Lock command issued for %s", self.lock_data.get("lockAlias"))
-        await self.coordinator.async_send_lock_command(lock_id, lock=True)
-        # Run refresh state for faster UI update
-        await self.coordinator.async_query_open_state()
-        self.async_write_ha_state()
+        # State is shown optimistically and confirmed by polling only this lock
+        if not await self.coordinator.async_confirmed_lock_command(lock_id, lock=True):
+            raise HomeAssistantError(f"Lock {self.lock_data.get('lockAlias')} did not confirm it locked")
 
     async def async_unlock(self, **kwargs):
         """Send unlock command to the device."""
-        lock_id = self.lock_data.get("lockId")
+        lock_id = self.lock_id
         if not lock_id:
             _LOGGER.warning("🔓 Cannot unlock: Missing lockId")
             return
 
         _LOGGER.info("🔓 Unlock command issued for %s", self.lock_data.get("lockAlias"))
-        await self.coordinator.async_send_lock_command(lock_id, lock=False)
-        # Run refresh state for faster UI update
-        await self.coordinator.async_query_open_state()
-        self.async_write_ha_state()
+        # State is shown optimistically and confirmed by polling only this lock
+        if not await self.coordinator.async_confirmed_lock_command(lock_id, lock=False):
+            raise HomeAssistantError(f"Lock {self.lock_data.get('lockAlias')} did not confirm it unlocked")
 
     @property
     def available(self):
-        return self.lock_data.get("lockId") is not None
+        return self.lock_id is not None
 
-    async def async_update(self):
-        await self.coordinator.async_request_refresh()
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Flag state that may be out of date: restored from the startup snapshot, or kept while the cloud is unreachable."""
+        return {"is_stale": self.coordinator.is_stale}
 
     async def async_added_to_hass(self):
         """Handle entity addition."""
         self.async_on_remove(self.coordinator.async_add_listener(self._handle_coordinator_update))
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self.coordinator.lock_signal(self.lock_id), self._handle_coordinator_update)
+        )
 
+    @callback
     def _handle_coordinator_update(self):
         """Called when coordinator updates data."""
-        # Update local lock data from coordinator base list
-        for updated_lock in self.coordinator.data:
-            if updated_lock.get("lockId") == self.lock_data.get("lockId"):
-                self.lock_data = updated_lock
-                break
+        # Update local lock data from the coordinator's lockId index
+        updated_lock = self.coordinator.get_lock(self.lock_id)
+        if updated_lock is not None:
+            self.lock_data = updated_lock
         self.async_write_ha_state()
 
 
@@ -110,7 +117,7 @@ async def async_setup_entry(
     """Set up Sifely lock entities."""
     _LOGGER.info("🔐 Setting up Sifely locks")
 
-    coordinator = hass.data[DOMAIN].get("coordinator")
+    coordinator = hass.data[DOMAIN].get(config_entry.entry_id, {}).get("coordinator")
     if not coordinator:
         _LOGGER.warning("⚠️ No coordinator found for Sifely locks")
         return
@@ -0,0 +1,88 @@
+import math
+from collections import Counter, deque
+
+from .const import (
+    TOKEN_ENDPOINT,
+    REFRESH_ENDPOINT,
+    KEYLIST_ENDPOINT,
+    LOCK_DETAIL_ENDPOINT,
+    QUERY_STATE_ENDPOINT,
+    LOCK_ENDPOINT,
+    UNLOCK_ENDPOINT,
+    LOCK_HISTORY_ENDPOINT,
+    LOCK_GATEWAYS_ENDPOINT,
+    METRICS_LATENCY_SAMPLES,
+)
+
+# Endpoint URL -> short name used as the metrics key
+ENDPOINT_NAMES = {
+    TOKEN_ENDPOINT: "login",
+    REFRESH_ENDPOINT: "refresh",
+    KEYLIST_ENDPOINT: "key_list",
+    LOCK_DETAIL_ENDPOINT: "lock_detail",
+    QUERY_STATE_ENDPOINT: "query_state",
+    LOCK_ENDPOINT: "lock",
+    UNLOCK_ENDPOINT: "unlock",
+    LOCK_HISTORY_ENDPOINT: "lock_history",
+    LOCK_GATEWAYS_ENDPOINT: "lock_gateways",
+}
+
+
+def percentile(sorted_samples: list, pct: float):
+    """Return the nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class EndpointStats:
+    """Request counters and a rolling latency window for one endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.gateway_busy = 0
+        self.http_errors = Counter()
+        self.api_errors = Counter()
+        self.latencies = deque(maxlen=METRICS_LATENCY_SAMPLES)
+
+    def as_dict(self) -> dict:
+        samples = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "gateway_busy": self.gateway_busy,
+            "http_errors": {str(k): v for k, v in self.http_errors.items()},
+            "api_errors": {str(k): v for k, v in self.api_errors.items()},
+            "latency_p50_ms": percentile(samples, 50),
+            "latency_p95_ms": percentile(samples, 95),
+            "latency_p99_ms": percentile(samples, 99),
+        }
+
+
+class SifelyApiMetrics:
+    """Per-endpoint metrics recorded by the API client."""
+
+    def __init__(self):
+        self.endpoints = {name: EndpointStats() for name in ENDPOINT_NAMES.values()}
+
+    def record(self, url: str, latency: float, status: int | None = None, code: int | None = None, error: bool = False, busy: bool = False):
+        """Record the outcome of one request. `latency` is in seconds."""
+        stats = self.endpoints.get(ENDPOINT_NAMES.get(url))
+        if stats is None:
+            return
+
+        stats.requests += 1
+        stats.latencies.append(round(latency * 1000, 1))
+        if busy:
+            stats.gateway_busy += 1
+        if error:
+            stats.errors += 1
+            if status is not None and status != 200:
+                stats.http_errors[status] += 1
+            if code is not None:
+                stats.api_errors[code] += 1
+
+    def as_dict(self) -> dict:
+        return {name: stats.as_dict() for name, stats in self.endpoints.items()}
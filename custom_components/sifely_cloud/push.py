@@ -0,0 +1,78 @@
+import json
+import logging
+
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, NAME, CONF_PUSH_ENABLED, CONF_WEBHOOK_ID
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_callback(payload) -> tuple[int | None, list[dict]]:
+    """Return (lockId, records) from a Sifely/TTLock lock-event callback.
+
+    The callback is a form (or JSON) body with a lockId and a "records" field
+    holding a JSON array of lock records. Records without their own lockId get
+    the callback's.
+    """
+    records = payload.get("records") or []
+    if isinstance(records, str):
+        records = json.loads(records)
+    if isinstance(records, dict):
+        records = [records]
+
+    lock_id = payload.get("lockId")
+    if lock_id is None and records:
+        lock_id = records[0].get("lockId")
+    lock_id = int(lock_id) if lock_id is not None else None
+
+    for record in records:
+        record.setdefault("lockId", lock_id)
+        for key in ("recordType", "success", "lockDate", "lockId"):
+            if isinstance(record.get(key), str) and record[key].lstrip("-").isdigit():
+                record[key] = int(record[key])
+    return lock_id, records
+
+
+async def async_setup_push(hass: HomeAssistant, entry: ConfigEntry, coordinator):
+    """Register the lock-event webhook for an entry if push mode is enabled."""
+    if not entry.options.get(CONF_PUSH_ENABLED):
+        return
+
+    webhook_id = entry.data.get(CONF_WEBHOOK_ID)
+    if not webhook_id:
+        webhook_id = webhook.async_generate_id()
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_WEBHOOK_ID: webhook_id})
+
+    async def _handle_webhook(hass: HomeAssistant, webhook_id: str, request: web.Request):
+        try:
+            if request.content_type == "application/json":
+                payload = await request.json()
+            else:
+                payload = dict(await request.post())
+            lock_id, records = parse_callback(payload)
+        except (ValueError, TypeError, AttributeError) as e:
+            _LOGGER.warning("⚠️ Ignoring malformed lock-event callback: %s", e)
+            return web.Response(status=400, text="invalid callback")
+
+        if lock_id is not None:
+            await coordinator.async_handle_push(lock_id, records)
+        # The Sifely/TTLock cloud expects a plain "success" acknowledgement
+        return web.Response(text="success")
+
+    # Callbacks come from the Sifely cloud, not the local network
+    webhook.async_register(
+        hass, DOMAIN, f"{NAME} ({entry.title})", webhook_id, _handle_webhook,
+        local_only=False, allowed_methods=["POST"],
+    )
+    entry.async_on_unload(lambda: webhook.async_unregister(hass, webhook_id))
+
+    try:
+        url = webhook.async_generate_url(hass, webhook_id)
+    except Exception:
+        url = webhook.async_generate_path(webhook_id)
+    _LOGGER.info("📬 Push mode enabled; set the Sifely callback URL to %s", url)
@@ -0,0 +1,143 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DATA_RATE_LIMITERS,
+    RATE_LIMIT_PER_SECOND,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MIN_PER_SECOND,
+    RATE_LIMIT_BACKOFF,
+    RATE_LIMIT_PENALTY_COOLDOWN,
+    RATE_LIMIT_RECOVERY_DELAY,
+    RATE_LIMIT_RECOVERY_STEP,
+    PRIORITY_COMMAND,
+    PRIORITY_STATE,
+    PRIORITY_BACKGROUND,
+    METRICS_LATENCY_SAMPLES,
+)
+from .metrics import percentile
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_NAMES = {
+    PRIORITY_COMMAND: "command",
+    PRIORITY_STATE: "state",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class SifelyRateLimiter:
+    """Prioritized token bucket limiting the request rate to one cloud host.
+
+    Shared by the API clients of every config entry that talks to the host, so
+    several accounts together stay within the cloud's limits. While requests are
+    waiting, tokens go to the lowest priority value first (commands, then state
+    polls, then details/history), in arrival order within a priority.
+
+    The rate adapts to the cloud: a 429 or -3003 (gateway busy) answer cuts it
+    by RATE_LIMIT_BACKOFF (at most once per RATE_LIMIT_PENALTY_COOLDOWN), and
+    after RATE_LIMIT_RECOVERY_DELAY without one it climbs back towards the
+    configured rate by RATE_LIMIT_RECOVERY_STEP per second.
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT_PER_SECOND, burst: int = RATE_LIMIT_BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._last_penalty = None
+        self._waiters = []
+        self._seq = itertools.count()
+        self._dispatcher = None
+        self.waits = 0
+        self.penalties = 0
+        self.wait_times = {name: deque(maxlen=METRICS_LATENCY_SAMPLES) for name in PRIORITY_NAMES.values()}
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        if self.rate < self.max_rate and (self._last_penalty is None or now - self._last_penalty >= RATE_LIMIT_RECOVERY_DELAY):
+            self.rate = min(self.max_rate, self.rate + RATE_LIMIT_RECOVERY_STEP * elapsed)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = PRIORITY_BACKGROUND):
+        """Wait until a request of the given priority may be sent."""
+        started = time.monotonic()
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+        else:
+            self.waits += 1
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._seq), future))
+            if self._dispatcher is None:
+                self._dispatcher = asyncio.get_running_loop().create_task(self._async_dispatch())
+            await future
+
+        name = PRIORITY_NAMES.get(priority, PRIORITY_NAMES[PRIORITY_BACKGROUND])
+        self.wait_times[name].append(round((time.monotonic() - started) * 1000, 1))
+
+    async def _async_dispatch(self):
+        """Hand out tokens to waiting requests as they refill, by priority."""
+        try:
+            while self._waiters:
+                self._refill()
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    continue
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():
+                    continue  # Caller gave up (cancelled) while waiting
+                self.tokens -= 1
+                future.set_result(None)
+        finally:
+            self._dispatcher = None
+
+    def penalize(self, reason: str):
+        """Cut the rate after the cloud pushed back (HTTP 429 or -3003)."""
+        now = time.monotonic()
+        if self._last_penalty is not None and now - self._last_penalty < RATE_LIMIT_PENALTY_COOLDOWN:
+            return
+        self._refill()
+        self._last_penalty = now
+        self.penalties += 1
+        self.rate = max(RATE_LIMIT_MIN_PER_SECOND, self.rate * RATE_LIMIT_BACKOFF)
+        # Drop any saved-up burst so the lower rate applies right away
+        self.tokens = min(self.tokens, 1.0)
+        _LOGGER.debug("🚦 Rate limited by the cloud (%s), slowing to %.2f requests/s", reason, self.rate)
+
+    def as_dict(self) -> dict:
+        self._refill()
+        stats = {
+            "rate": round(self.rate, 2),
+            "max_rate": self.max_rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2),
+            "queued": sum(not future.done() for _, _, future in self._waiters),
+            "waits": self.waits,
+            "penalties": self.penalties,
+        }
+        for name, samples in self.wait_times.items():
+            ordered = sorted(samples)
+            stats[f"{name}_wait_p50_ms"] = percentile(ordered, 50)
+            stats[f"{name}_wait_p95_ms"] = percentile(ordered, 95)
+        return stats
+
+
+def get_rate_limiter(hass: HomeAssistant, base_url: str) -> SifelyRateLimiter:
+    """Return the rate limiter shared by all config entries for the URL's host."""
+    host = urlparse(base_url).netloc
+    limiters = hass.data.setdefault(DATA_RATE_LIMITERS, {})
+    if host not in limiters:
+        _LOGGER.debug("🚦 Creating shared rate limiter for %s (%s/s, burst %s)", host, RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+        limiters[host] = SifelyRateLimiter()
+    return limiters[host]
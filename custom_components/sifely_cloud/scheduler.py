@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import random
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import JOB_START_JITTER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SifelyJobScheduler:
+    """Runs named periodic jobs without letting runs of the same job overlap.
+
+    Each tick is delayed by a random jitter so jobs sharing an interval boundary
+    don't hit the cloud in the same second. A tick that arrives while the previous
+    run of the same job is still in flight is skipped.
+    """
+
+    def __init__(self, hass: HomeAssistant, jitter: float = JOB_START_JITTER):
+        self.hass = hass
+        self.jitter = jitter
+        self._in_flight = set()
+        self._unsubs = []
+        self.stats = {}
+
+    def async_add_job(self, name: str, func, interval: int):
+        """Schedule func() to run every `interval` seconds under the given name."""
+        self.stats[name] = {"runs": 0, "skipped": 0, "last_duration": None}
+
+        async def _tick(now):
+            await self._async_run(name, func)
+
+        self._unsubs.append(async_track_time_interval(self.hass, _tick, timedelta(seconds=interval)))
+        _LOGGER.debug("🗓️ Scheduled job '%s' every %ds", name, interval)
+
+    async def _async_run(self, name: str, func):
+        stats = self.stats[name]
+
+        if name in self._in_flight:
+            stats["skipped"] += 1
+            _LOGGER.debug("⏭️ Skipping '%s' tick: previous run still in flight (%d skipped)", name, stats["skipped"])
+            return
+
+        self._in_flight.add(name)
+        try:
+            if self.jitter > 0:
+                await asyncio.sleep(random.uniform(0, self.jitter))
+
+            started = self.hass.loop.time()
+            await func()
+            stats["runs"] += 1
+            stats["last_duration"] = round(self.hass.loop.time() - started, 3)
+        except Exception as e:
+            _LOGGER.warning("⚠️ Scheduled job '%s' failed: %s", name, e)
+        finally:
+            self._in_flight.discard(name)
+
+    def async_stop(self):
+        """Cancel all scheduled jobs."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
@@ -1,14 +1,14 @@
 import logging
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.util import slugify
-from datetime import datetime, timezone
 
-from .const import DOMAIN, ENTITY_PREFIX, HISTORY_DISPLAY_LIMIT, HISTORY_RECORD_TYPES
+from .const import DOMAIN, ENTITY_PREFIX, HISTORY_RECORD_TYPES, METRICS_SENSOR_ENDPOINTS
 from .device import async_register_lock_device
 
 _LOGGER = logging.getLogger(__name__)
@@ -44,6 +44,14 @@ def create_error_entities(locks: list[dict], coordinator) -> list[SensorEntity]:
             _LOGGER.warning("⚠️ Skipping error sensor for lock with missing lockId: %s", lock)
     return entities
 
+def create_metrics_entities(coordinator) -> list[SensorEntity]:
+    """Create cloud API latency sensor entities, one per instrumented endpoint, and the command queue sensor."""
+    entities = [SifelyApiLatencySensor(endpoint, coordinator) for endpoint in METRICS_SENSOR_ENDPOINTS]
+    entities.append(SifelyCommandQueueSensor(coordinator))
+    if coordinator.api.rate_limiter is not None:
+        entities.append(SifelyRateLimiterSensor(coordinator))
+    return entities
+
 
 class SifelyBatterySensor(CoordinatorEntity, SensorEntity):
     """Battery level sensor for Sifely Smart Lock."""
@@ -63,12 +71,12 @@ class SifelyBatterySensor(CoordinatorEntity, SensorEntity):
         self._attr_native_unit_of_measurement = "%"
         self._attr_state_class = "measurement"
         self._attr_device_info = async_register_lock_device(lock_data)
+        self.lock_id = lock_id
 
     @property
     def native_value(self) -> int | None:
         """Return the current battery level."""
-        lock_id = self.lock_data.get("lockId")
-        details = self.coordinator.details_data.get(lock_id)
+        details = self.coordinator.details_data.get(self.lock_id)
         if not details:
             return None
         return details.get("electricQuantity")
@@ -76,8 +84,19 @@ class SifelyBatterySensor(CoordinatorEntity, SensorEntity):
     @property
     def available(self):
         """Battery sensor is only available if lockId is known and battery info has been fetched."""
-        lock_id = self.lock_data.get("lockId")
-        return lock_id is not None and lock_id in self.coordinator.details_data
+        return self.lock_id is not None and self.lock_id in self.coordinator.details_data
+
+    async def async_added_to_hass(self):
+        """Subscribe to change notifications for this lock."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self.coordinator.lock_signal(self.lock_id), self.async_write_ha_state)
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Flag values that may be out of date: restored from the startup snapshot, or kept while the cloud is unreachable."""
+        return {"is_stale": self.coordinator.is_stale}
 
 
 class SifelyLockHistorySensor(CoordinatorEntity, SensorEntity):
@@ -103,53 +122,22 @@ class SifelyLockHistorySensor(CoordinatorEntity, SensorEntity):
         self._attr_entity_category = EntityCategory.DIAGNOSTIC
         self._attr_extra_state_attributes = {}
 
-        if not hasattr(coordinator, "update_history_sensor"):
-            coordinator.update_history_sensor = self._external_update
-
         self._latest_entries: list[dict] = []
 
-
-    async def async_update(self):
-        """Fetch latest lock history from coordinator."""
-        history = await self.coordinator.async_query_lock_history(self.lock_id)
-
-        if not history:
-            self._attr_native_value = "No recent activity"
-            self._attr_extra_state_attributes = {}
-            return
-
-        # Create a summary string (last user, time, type)
-        lines = []
-        attr_map = {}
-
-        for i, entry in enumerate(history[:HISTORY_DISPLAY_LIMIT]):
-            user = entry.get("username", "Unknown")
-            ts = entry.get("lockDate")
-            record_type = entry.get("recordType", "N/A")
-            success = entry.get("success", -1)
-
-            # Map record type to readable name
-            method = HISTORY_RECORD_TYPES.get(record_type, f"Type {record_type}")
-            success_text = "✅ Success" if success == 1 else "❌ Failed"
-
-            try:
-                dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).astimezone()
-                formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-            except Exception:
-                formatted_time = str(ts)
-
-            line = f"{formatted_time}: {user} via {method} — {success_text}"
-            lines.append(line)
-            attr_map[f"entry_{i+1}"] = line
-
-        self._attr_native_value = lines[0] if lines else "No recent activity"
-        self._attr_extra_state_attributes = attr_map
-
-    async def _external_update(self, lock_id, entries):
-        """Receive external history data from the coordinator."""
-        if lock_id != self.lock_id:
-            return
-
+    async def async_added_to_hass(self):
+        """Show cached history and subscribe to history sweeps for this lock."""
+        await super().async_added_to_hass()
+        cached = self.coordinator.history_cache.get(self.lock_id)
+        if cached is not None:
+            self._latest_entries = cached
+            self._update_from_entries()
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self.coordinator.history_signal(self.lock_id), self._external_update)
+        )
+
+    @callback
+    def _external_update(self, entries):
+        """Receive history entries for this lock from the coordinator's sweep."""
         self._latest_entries = entries
         self._update_from_entries()
         self.async_write_ha_state()
@@ -170,7 +158,8 @@ class SifelyLockHistorySensor(CoordinatorEntity, SensorEntity):
             record_type = entry.get("recordType", "N/A")
             success = entry.get("success", "Unknown")
 
-            method = HISTORY_RECORD_TYPES.get(record_type, f"Type {record_type}")
+            # Stored entries already carry the readable record type name
+            method = record_type if isinstance(record_type, str) else HISTORY_RECORD_TYPES.get(record_type, f"Type {record_type}")
             formatted = f"{username} - {method} - {success}"
 
             # Use timestamp as the key (ensures clean UI labels)
@@ -201,10 +190,24 @@ class SifelyCloudErrorSensor(CoordinatorEntity, SensorEntity):
         self._attr_extra_state_attributes = {}
         self._attr_device_info = async_register_lock_device(lock_data)
 
-        coordinator.set_cloud_error = self.set_error
-        coordinator.clear_cloud_error = self.clear_error
+    async def async_added_to_hass(self):
+        """Subscribe to cloud error notifications for this lock."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self.coordinator.error_signal(self.lock_id), self._handle_error)
+        )
+
+    @callback
+    def _handle_error(self, message: str | None):
+        if message is None:
+            self.clear_error()
+        else:
+            self.set_error(message)
 
     def set_error(self, message: str):
+        if self._attr_native_value == "Error" and self._attr_extra_state_attributes.get("last_error") == message:
+            self.coordinator.suppressed_writes += 1
+            return
         self._attr_native_value = "Error"
         self._attr_extra_state_attributes = {"last_error": message}
         if self.hass:
@@ -213,6 +216,9 @@ class SifelyCloudErrorSensor(CoordinatorEntity, SensorEntity):
             _LOGGER.warning("⚠️ Cannot update error sensor — hass is None")
 
     def clear_error(self):
+        if self._attr_native_value == "OK":
+            self.coordinator.suppressed_writes += 1
+            return
         self._attr_native_value = "OK"
         self._attr_extra_state_attributes = {}
         if self.hass:
@@ -221,6 +227,77 @@ class SifelyCloudErrorSensor(CoordinatorEntity, SensorEntity):
             _LOGGER.warning("⚠️ Cannot clear error sensor — hass is None")
 
 
+class SifelyApiLatencySensor(SensorEntity):
+    """Diagnostic sensor exposing request metrics for one Sifely cloud endpoint."""
+
+    def __init__(self, endpoint: str, coordinator):
+        self.coordinator = coordinator
+        self.endpoint = endpoint
+
+        self._attr_name = f"{ENTITY_PREFIX.capitalize()} API {endpoint.replace('_', ' ').title()} Latency"
+        self._attr_unique_id = f"{ENTITY_PREFIX}_api_latency_{endpoint}_{coordinator.config_entry.entry_id}"
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_native_unit_of_measurement = "ms"
+        self._attr_state_class = "measurement"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def _stats(self) -> dict:
+        return self.coordinator.api.metrics.endpoints[self.endpoint].as_dict()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the p95 request latency in milliseconds."""
+        return self._stats["latency_p95_ms"]
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return self._stats
+
+
+class SifelyCommandQueueSensor(SensorEntity):
+    """Diagnostic sensor exposing the lock/unlock command queue depth and latency."""
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+
+        self._attr_name = f"{ENTITY_PREFIX.capitalize()} Command Queue"
+        self._attr_unique_id = f"{ENTITY_PREFIX}_command_queue_{coordinator.config_entry.entry_id}"
+        self._attr_icon = "mdi:tray-full"
+        self._attr_state_class = "measurement"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of running and waiting commands."""
+        return self.coordinator.command_queue.depth()
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return self.coordinator.command_queue.as_dict()
+
+
+class SifelyRateLimiterSensor(SensorEntity):
+    """Diagnostic sensor exposing the shared cloud rate limiter's tokens and queue wait."""
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+
+        self._attr_name = f"{ENTITY_PREFIX.capitalize()} API Rate Limiter Tokens"
+        self._attr_unique_id = f"{ENTITY_PREFIX}_rate_limiter_{coordinator.config_entry.entry_id}"
+        self._attr_icon = "mdi:speedometer"
+        self._attr_state_class = "measurement"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def native_value(self) -> float:
+        """Return the tokens currently available to send requests."""
+        return self.coordinator.api.rate_limiter.as_dict()["tokens"]
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        return self.coordinator.api.rate_limiter.as_dict()
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -230,7 +307,7 @@ async def async_setup_entry(
     """Set up Sifely sensors (battery + history)."""
     _LOGGER.info("🔋 Setting up Sifely sensors")
 
-    coordinator = hass.data[DOMAIN].get("coordinator")
+    coordinator = hass.data[DOMAIN].get(config_entry.entry_id, {}).get("coordinator")
     if not coordinator:
         _LOGGER.warning("⚠️ No coordinator found for sensors")
         return
@@ -238,8 +315,9 @@ async def async_setup_entry(
     battery_entities = create_battery_entities(coordinator.data, coordinator)
     history_entities = create_history_entities(coordinator.data, coordinator)
     error_entities = create_error_entities(coordinator.data, coordinator)
+    metrics_entities = create_metrics_entities(coordinator)
 
-    all_entities = battery_entities + history_entities + error_entities
+    all_entities = battery_entities + history_entities + error_entities + metrics_entities
     async_add_entities(all_entities)
 
     if battery_entities:
@@ -248,6 +326,8 @@ async def async_setup_entry(
         _LOGGER.info("📜 %d history sensors added.", len(history_entities))
     if error_entities:
         _LOGGER.info("🚨 %d error sensors added.", len(error_entities))
+    if metrics_entities:
+        _LOGGER.info("⏱️ %d API metrics sensors added.", len(metrics_entities))
     if not all_entities:
         _LOGGER.warning("⚠️ No sensors found to set up.")
 
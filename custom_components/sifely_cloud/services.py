@@ -0,0 +1,104 @@
+import logging
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_LOCK_ALL = "lock_all"
+SERVICE_BULK_COMMAND = "bulk_command"
+
+ATTR_COMMAND = "command"
+ATTR_LOCK_ID = "lock_id"
+
+LOCK_ALL_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional(ATTR_LOCK_ID): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+})
+
+BULK_COMMAND_SCHEMA = LOCK_ALL_SCHEMA.extend({
+    vol.Required(ATTR_COMMAND): vol.In(["lock", "unlock"]),
+})
+
+
+def _coordinators(hass: HomeAssistant) -> list:
+    """Return the coordinator of every loaded config entry."""
+    return [
+        data["coordinator"]
+        for data in hass.data.get(DOMAIN, {}).values()
+        if isinstance(data, dict) and data.get("coordinator")
+    ]
+
+
+def _resolve_targets(hass: HomeAssistant, call: ServiceCall) -> dict:
+    """Map the call's entity_id/lock_id targets (or every lock) to {coordinator: [lockId, ...]}."""
+    coordinators = _coordinators(hass)
+    lock_ids = set(call.data.get(ATTR_LOCK_ID, []))
+
+    if ATTR_ENTITY_ID in call.data:
+        registry = er.async_get(hass)
+        for entity_id in call.data[ATTR_ENTITY_ID]:
+            entry = registry.async_get(entity_id)
+            if entry is None or entry.platform != DOMAIN or entry.domain != "lock":
+                raise HomeAssistantError(f"{entity_id} is not a Sifely lock")
+            # Lock unique IDs end in the lockId (see SifelySmartLock)
+            lock_ids.add(int(entry.unique_id.rsplit("_", 1)[1]))
+
+    targets = {}
+    for coordinator in coordinators:
+        known = coordinator._lock_ids()
+        selected = [lock_id for lock_id in known if lock_id in lock_ids] if lock_ids else known
+        if selected:
+            targets[coordinator] = selected
+
+    missing = lock_ids - {lock_id for selected in targets.values() for lock_id in selected}
+    if missing:
+        raise HomeAssistantError(f"Unknown Sifely lock IDs: {sorted(missing)}")
+    return targets
+
+
+async def _async_run_bulk(hass: HomeAssistant, call: ServiceCall, lock: bool) -> ServiceResponse:
+    results = {}
+    for coordinator, lock_ids in _resolve_targets(hass, call).items():
+        outcome = await coordinator.async_bulk_lock_command(lock_ids, lock)
+        for lock_id, result in outcome.items():
+            lock_data = coordinator.get_lock(lock_id) or {}
+            results[str(lock_id)] = {"name": lock_data.get("lockAlias"), "result": result}
+
+    summary = {
+        "total": len(results),
+        "confirmed": sum(r["result"] == "confirmed" for r in results.values()),
+        "unconfirmed": sum(r["result"] == "unconfirmed" for r in results.values()),
+        "failed": sum(r["result"] == "failed" for r in results.values()),
+        "superseded": sum(r["result"] == "superseded" for r in results.values()),
+    }
+    if summary["confirmed"] != summary["total"]:
+        _LOGGER.warning("⚠️ Bulk %s finished with %s", "lock" if lock else "unlock", summary)
+    return {"summary": summary, "locks": results}
+
+
+def async_setup_services(hass: HomeAssistant):
+    """Register the lock_all and bulk_command services."""
+    if hass.services.has_service(DOMAIN, SERVICE_BULK_COMMAND):
+        return
+
+    async def _handle_lock_all(call: ServiceCall) -> ServiceResponse:
+        return await _async_run_bulk(hass, call, lock=True)
+
+    async def _handle_bulk_command(call: ServiceCall) -> ServiceResponse:
+        return await _async_run_bulk(hass, call, lock=call.data[ATTR_COMMAND] == "lock")
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_LOCK_ALL, _handle_lock_all,
+        schema=LOCK_ALL_SCHEMA, supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_BULK_COMMAND, _handle_bulk_command,
+        schema=BULK_COMMAND_SCHEMA, supports_response=SupportsResponse.OPTIONAL,
+    )
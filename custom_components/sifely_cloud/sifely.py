@@ -1,13 +1,15 @@
 # sifely.py (with lock/unlock command support)
 
+import asyncio
 import logging
-import json
-from datetime import datetime, timezone, timedelta
-from .history_utils import fetch_and_update_lock_history
+from datetime import datetime, timezone
+from .history_utils import SifelyHistoryStore, fetch_and_update_lock_history, get_history_db_path, store_lock_history
 
 from homeassistant.util import dt as dt_util
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 
@@ -15,24 +17,53 @@ from .const import (
     DOMAIN,
     CONF_APX_NUM_LOCKS,
     LOCK_REQUEST_RETRIES,
+    COMMAND_VERIFY_ATTEMPTS,
+    COMMAND_VERIFY_INTERVAL,
+    COMMAND_RETRY_BACKOFF,
+    COMMAND_RETRY_MAX_BACKOFF,
     STATE_QUERY_INTERVAL,
+    ADAPTIVE_POLL_FLOOR,
+    ADAPTIVE_POLL_CEILING,
+    ADAPTIVE_POLL_BACKOFF,
     DETAILS_UPDATE_INTERVAL,
+    SNAPSHOT_SAVE_DELAY,
     HISTORY_DISPLAY_LIMIT,
     HISTORY_INTERVAL,
+    HISTORY_FETCH_DEBOUNCE,
+    PUSH_RECONCILE_INTERVAL,
+    PUSH_ACTIVE_WINDOW,
+    PUSH_LOCKED_RECORD_TYPES,
+    PUSH_UNLOCKED_RECORD_TYPES,
+    EVENT_LOCK_TRANSITION,
     TOKEN_401s_BEFORE_REAUTH,
     TOKEN_401s_BEFOR_ALERT,
+    MAX_CONCURRENT_REQUESTS,
+    GATEWAY_ID_KEYS,
+    GATEWAY_BUSY_RETRIES,
+    GATEWAY_BUSY_BACKOFF,
+    KEYLIST_MAX_PAGES,
+    KEYLIST_PAGE_SIZE,
     KEYLIST_ENDPOINT,
-    LOCK_DETAIL_ENDPOINT,
-    QUERY_STATE_ENDPOINT,
-    LOCK_ENDPOINT,
-    UNLOCK_ENDPOINT,
-    LOCK_HISTORY_ENDPOINT,
+    SIGNAL_LOCK_UPDATED,
+    SIGNAL_HISTORY_UPDATED,
+    SIGNAL_CLOUD_ERROR,
+    CIRCUIT_RAMP_UP,
 )
 from .token_manager import SifelyTokenManager
+from .sifely_api import SifelyApiError, SifelyAuthError, SifelyGatewayBusyError, SifelyCircuitOpenError
+from .scheduler import SifelyJobScheduler
+from .command_queue import SifelyCommandQueue
 
 _LOGGER = logging.getLogger(__name__)
 
 HISTORY_FOLDER = "history"
+SNAPSHOT_STORAGE_VERSION = 1
+
+# Returned by per-lock queries when nothing should be merged for that lock
+_NO_UPDATE = object()
+
+# Error sensor message set on every lock while the circuit breaker is open
+_CIRCUIT_OPEN_ERROR = "Sifely cloud unreachable"
 
 class SifelyCoordinator(DataUpdateCoordinator):
     """Coordinates updates for Sifely locks."""
@@ -46,259 +77,836 @@ class SifelyCoordinator(DataUpdateCoordinator):
         self.hass = hass
         self.token_manager = token_manager
         self.config_entry = config_entry
-        self.session = token_manager.session
-        self.access_token = token_manager.access_token
+        self.api = token_manager.api
         self.apx_locks = config_entry.options.get(CONF_APX_NUM_LOCKS, 5)
 
-        if not self.access_token:
-            raise UpdateFailed("❌ Could not retrieve valid login token.")
-
         self.last_details_update = datetime.min.replace(tzinfo=timezone.utc)
         self.lock_list = []
+        self.locks_by_id = {}
+        self.changed_lock_ids = set()
+        self.suppressed_writes = 0
         self.details_data = {}
+        self.lock_gateways = {}
         self.open_state_data = {}
+        self._poll_interval = {}
+        self._next_poll = {}
         self._consecutive_401s = 0
-
-
+        self.history_marks = {}
+        self.history_cache = {}
+        self.history_store = SifelyHistoryStore(get_history_db_path(config_entry.entry_id))
+        self.scheduler = SifelyJobScheduler(hass)
+        self.command_queue = SifelyCommandQueue(hass, self._async_execute_lock_command)
+        self._reported_state = {}
+        self.cloud_errors = {}
+        self._history_fetch_unsubs = {}
+        self.last_push = None
+        self.pushes_received = 0
+        self._snapshot_stale = False
+        self.api.breaker.on_change = self._handle_circuit_change
+        self._snapshot_store = Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{config_entry.entry_id}")
 
         super().__init__(
             hass,
             _LOGGER,
-            name="sifely_lock_coordinator",
-            # update_interval is disabled; polling is done manually via async_track_time_interval
+            name=f"sifely_lock_coordinator_{config_entry.entry_id}",
+            # update_interval is disabled; polling is done manually via self.scheduler
         )
+        # DataUpdateCoordinator sets config_entry from the entry being set up (None outside of setup)
+        self.config_entry = config_entry
+
+    @property
+    def is_stale(self) -> bool:
+        """True while entities show snapshot data not yet revalidated, or the cloud is unreachable."""
+        return self._snapshot_stale or self.api.breaker.is_open
+
+    @property
+    def push_active(self) -> bool:
+        """True while push callbacks have arrived within the last PUSH_ACTIVE_WINDOW seconds."""
+        return self.last_push is not None and self.hass.loop.time() - self.last_push < PUSH_ACTIVE_WINDOW
 
     async def _async_update_data(self):
         """Disabled auto-update mechanism (we handle it manually)."""
         return self.lock_list
 
     async def async_fetch_lock_list(self):
-        """Get lock data from the Sifely API."""
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-        params = {
-            "pageNo": 1,
-            "pageSize": self.apx_locks,
-        }
+        """Get lock data from the Sifely API, following every page of the key list.
+
+        The first page (sized by the apxNumLocks option) reports how many locks
+        there are. If it doesn't hold them all, the list is fetched again in
+        pages of at least KEYLIST_PAGE_SIZE, concurrently. If the cloud doesn't
+        report a total, pages are walked until a short one comes back. At most
+        KEYLIST_MAX_PAGES follow-up pages are fetched; a warning is logged if
+        locks are left out.
+        """
+        page_size = self.apx_locks
+        locks = {}
+
+        def _merge(page: dict):
+            for lock in page.get("list", []):
+                lock_id = lock.get("lockId")
+                locks[lock_id if lock_id is not None else id(lock)] = lock
 
         try:
             _LOGGER.debug("📡 Fetching lock list from: %s", KEYLIST_ENDPOINT)
-            async with self.session.post(KEYLIST_ENDPOINT, headers=headers, params=params) as resp:
-                text = await resp.text()
-                _LOGGER.debug("🔑 Lock list raw response: %s", text)
-
-                try:
-                    data = json.loads(text)
-                except Exception as e:
-                    raise UpdateFailed(f"Failed to parse lock list response: {e}")
-
-                if resp.status != 200 or "list" not in data:
-                    raise UpdateFailed(f"Unexpected lock list response: {data}")
-
-                locks = data["list"]
-                self.lock_list = locks
-                _LOGGER.info("✅ Fetched %d locks", len(locks))
-                return locks
+            first = await self.api.async_get_key_list(page_no=1, page_size=page_size)
+            _merge(first)
+
+            total = first.get("total")
+            if total is None and first.get("pages"):
+                total = first["pages"] * page_size
+
+            # Page offsets move with the page size, so a larger size starts over at page 1
+            follow_size = max(page_size, KEYLIST_PAGE_SIZE)
+            first_page_no = 2 if follow_size == page_size else 1
+
+            if total is not None:
+                pages = -(-total // follow_size)
+                last_page_no = min(pages, first_page_no + KEYLIST_MAX_PAGES - 1)
+                if total > page_size:
+                    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+                    async def _fetch(page_no):
+                        async with semaphore:
+                            return await self.api.async_get_key_list(page_no=page_no, page_size=follow_size)
+
+                    # gather() keeps page order, so the lock list order is stable across refetches
+                    for page in await asyncio.gather(*(_fetch(page_no) for page_no in range(first_page_no, last_page_no + 1))):
+                        _merge(page)
+                truncated = pages > last_page_no
+            else:
+                page_no, last, last_size = first_page_no - 1, first, page_size
+                while len(last.get("list", [])) >= last_size and page_no - first_page_no + 1 < KEYLIST_MAX_PAGES:
+                    page_no += 1
+                    last, last_size = await self.api.async_get_key_list(page_no=page_no, page_size=follow_size), follow_size
+                    _merge(last)
+                truncated = len(last.get("list", [])) >= last_size
+
+            if truncated:
+                _LOGGER.warning(
+                    "⚠️ Lock list has more than %d pages of %d; only the first %d locks were loaded",
+                    KEYLIST_MAX_PAGES, follow_size, len(locks),
+                )
+
+            self._set_lock_list(list(locks.values()))
+            _LOGGER.info("✅ Fetched %d locks (%d changed)", len(self.lock_list), len(self.changed_lock_ids))
+            self._notify_locks(self.changed_lock_ids)
+            return self.lock_list
 
         except Exception as e:
             _LOGGER.exception("🚨 Failed to fetch lock list: %s", str(e))
             raise UpdateFailed(f"Exception fetching locks: {str(e)}")
 
-    async def async_query_open_state(self):
-        """Query open/locked state for each lock and store in self.open_state_data."""
-        if not self.lock_list:
-            _LOGGER.debug("⏩ Skipping open state polling: lock list not available")
-            return
-
-        if not hasattr(self, "_consecutive_401s"):
-            self._consecutive_401s = 0
-
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
+    def _set_lock_list(self, locks: list) -> set:
+        """Replace the lock list and update the lockId index in place.
 
+        Returns (and stores in changed_lock_ids) the IDs of locks that were
+        added, removed or whose record changed.
+        """
+        changed = set()
+        seen = set()
+        for lock in locks:
+            lock_id = lock.get("lockId")
+            if lock_id is None:
+                continue
+            seen.add(lock_id)
+            if self.locks_by_id.get(lock_id) != lock:
+                self.locks_by_id[lock_id] = lock
+                changed.add(lock_id)
+
+        for lock_id in set(self.locks_by_id) - seen:
+            del self.locks_by_id[lock_id]
+            changed.add(lock_id)
+
+        self.lock_list = locks
+        self.changed_lock_ids = changed
+        return changed
+
+    def _merge_lock_updates(self, target: dict, updates: dict, polled: list) -> set:
+        """Merge per-lock updates into target and notify only the locks whose value changed.
+
+        Polled locks whose value is unchanged don't get notified; they're counted
+        in suppressed_writes instead.
+        """
+        changed = {lock_id for lock_id, value in updates.items() if target.get(lock_id, _NO_UPDATE) != value}
+        target.update(updates)
+        self.suppressed_writes += len(set(polled) - changed)
+        if changed:
+            self._schedule_snapshot_save()
+            self._notify_locks(changed)
+        return changed
+
+    def _notify_locks(self, lock_ids):
+        """Tell the entities of the given locks that their data changed."""
+        for lock_id in lock_ids:
+            async_dispatcher_send(self.hass, self.lock_signal(lock_id))
+
+    def lock_signal(self, lock_id) -> str:
+        """Return the dispatcher signal sent when a lock's data changes."""
+        return SIGNAL_LOCK_UPDATED.format(self.config_entry.entry_id, lock_id)
+
+    def get_lock(self, lock_id) -> dict | None:
+        """Return the lock record for a lockId."""
+        return self.locks_by_id.get(lock_id)
+
+    def _lock_ids(self) -> list:
+        """Return the lockIds of all known locks, skipping malformed entries."""
+        lock_ids = []
         for lock in self.lock_list:
             lock_id = lock.get("lockId")
             if not lock_id:
                 _LOGGER.warning("🔑 Skipping lock with missing lockId: %s", lock)
                 continue
-
-            url = f"{QUERY_STATE_ENDPOINT}?lockId={lock_id}"
+            lock_ids.append(lock_id)
+        return lock_ids
+
+    def _gateway_groups(self, lock_ids: list) -> list[list]:
+        """Group locks by the gateway they're reached through.
+
+        Uses the gateway list fetched per lock (see async_query_lock_gateways),
+        falling back to GATEWAY_ID_KEYS in details_data. Locks without a known
+        gateway get a group of their own.
+        """
+        groups = {}
+        for lock_id in lock_ids:
+            gateway_id = self.lock_gateways.get(lock_id)
+            if gateway_id is None:
+                details = self.details_data.get(lock_id) or {}
+                gateway_id = next((details[key] for key in GATEWAY_ID_KEYS if details.get(key)), None)
+            key = ("gateway", gateway_id) if gateway_id is not None else ("lock", lock_id)
+            groups.setdefault(key, []).append(lock_id)
+        return list(groups.values())
+
+    async def _async_call_with_busy_retry(self, func, lock_id):
+        """Call func(lock_id), retrying -3003 gateway-busy responses with backoff."""
+        delay = GATEWAY_BUSY_BACKOFF
+        for attempt in range(GATEWAY_BUSY_RETRIES + 1):
             try:
-                async with self.session.get(url, headers=headers) as resp:
-                    text = await resp.text()
-                    _LOGGER.debug("🔒 Open state response for %s: %s", lock_id, text)
-
-                    try:
-                        data = json.loads(text)
-
-                        if resp.status == 200:
-                            self._consecutive_401s = 0
-                            if hasattr(self, "clear_cloud_error"):
-                                self.clear_cloud_error()
+                return await func(lock_id)
+            except SifelyGatewayBusyError:
+                if attempt == GATEWAY_BUSY_RETRIES:
+                    _LOGGER.debug("⏳ Gateway still busy for %s after %d retries, skipping this sweep", lock_id, attempt)
+                    return _NO_UPDATE
+                _LOGGER.debug("⏳ Gateway busy for %s, retrying in %.1fs", lock_id, delay)
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _async_fan_out(self, func, lock_ids: list) -> dict:
+        """Run func(lock_id) for every lock and collect the results.
+
+        Locks sharing a gateway are queried one after another, while different
+        gateways run in parallel (at most MAX_CONCURRENT_REQUESTS at once). func
+        may raise SifelyGatewayBusyError to have the call retried with backoff;
+        per-request timeouts are enforced by the API client. Locks that return
+        _NO_UPDATE are left out of the result, so callers can merge it into their
+        data in one step.
+        """
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        results = {}
+
+        async def _run_group(group):
+            async with semaphore:
+                for lock_id in group:
+                    results[lock_id] = await self._async_call_with_busy_retry(func, lock_id)
+
+        await asyncio.gather(*(_run_group(group) for group in self._gateway_groups(lock_ids)))
+        return {lock_id: value for lock_id, value in results.items() if value is not _NO_UPDATE}
+
+    def mark_lock_active(self, lock_id):
+        """Poll a lock at the fastest cadence, e.g. after a lock/unlock command."""
+        self._poll_interval[lock_id] = ADAPTIVE_POLL_FLOOR
+        self._next_poll[lock_id] = self.hass.loop.time()
+
+    def _due_lock_ids(self) -> list:
+        """Return the locks whose adaptive poll interval has elapsed."""
+        now = self.hass.loop.time()
+        return [lock_id for lock_id in self._lock_ids() if self._next_poll.get(lock_id, 0) <= now]
+
+    def _idle_lock_ids(self, lock_ids: list) -> list:
+        """Leave out locks with a command queued or running; the command verifies their state itself."""
+        return [lock_id for lock_id in lock_ids if not self.command_queue.depth(lock_id)]
+
+    def _reschedule_polls(self, lock_ids: list, updates: dict):
+        """Tighten the poll interval of locks that changed and back off idle ones."""
+        now = self.hass.loop.time()
+        for lock_id in lock_ids:
+            interval = self._poll_interval.get(lock_id, STATE_QUERY_INTERVAL)
+            if lock_id not in self.open_state_data:
+                interval = STATE_QUERY_INTERVAL
+            elif lock_id in updates and updates[lock_id] != self.open_state_data[lock_id]:
+                interval = ADAPTIVE_POLL_FLOOR
+            else:
+                interval = min(interval * ADAPTIVE_POLL_BACKOFF, ADAPTIVE_POLL_CEILING)
+            self._poll_interval[lock_id] = interval
+            # With callbacks arriving, polling is only a slow reconciliation pass
+            self._next_poll[lock_id] = now + (max(interval, PUSH_RECONCILE_INTERVAL) if self.push_active else interval)
+
+    async def async_query_open_state(self, force: bool = False):
+        """Query open/locked state for each due lock and store in self.open_state_data.
+
+        Locks are polled on an adaptive cadence (see mark_lock_active); pass
+        force=True to poll every lock regardless of its schedule. Locks with a
+        command in flight are skipped so their optimistic state isn't overwritten.
+        """
+        if not self.lock_list:
+            _LOGGER.debug("⏩ Skipping open state polling: lock list not available")
+            return
 
-                            if "code" in data:
-                                if data.get("code") == 200:
-                                    self.open_state_data[lock_id] = data.get("data", {}).get("state")
-                                elif data.get("code") == -3003:
-                                    _LOGGER.debug("⏳ Gateway busy when querying state for %s. Will retry.", lock_id)
-                                else:
-                                    _LOGGER.warning("⚠️ Unexpected open state for %s: %s", lock_id, data)
+        if self.api.breaker.is_open:
+            # Keep serving the last known state; only a probe goes out while the cloud is down
+            if self.api.breaker.probe_due():
+                await self._async_probe_cloud()
+            return
 
-                            elif "state" in data:
-                                self.open_state_data[lock_id] = data.get("state")
-                            else:
-                                _LOGGER.warning("⚠️ Unknown open state format for %s: %s", lock_id, data)
+        lock_ids = self._idle_lock_ids(self._lock_ids() if force else self._due_lock_ids())
+        if not lock_ids:
+            return
 
-                        elif resp.status == 401:
-                            self._consecutive_401s += 1
-                            _LOGGER.warning("⚠️ Received 401 (#%d) when fetching state for %s", self._consecutive_401s, lock_id)
+        if not hasattr(self, "_consecutive_401s"):
+            self._consecutive_401s = 0
 
-                            if self._consecutive_401s == TOKEN_401s_BEFORE_REAUTH:
-                                _LOGGER.warning(f"🔁 Detected {TOKEN_401s_BEFORE_REAUTH} consecutive 401s. Triggering token refresh...")
-                                await self.token_manager.refresh_login_token()
+        updates = await self._async_fan_out(self._async_query_open_state_for, lock_ids)
+        # A command may have been queued while the poll was in flight
+        lock_ids = self._idle_lock_ids(lock_ids)
+        updates = {lock_id: updates[lock_id] for lock_id in self._idle_lock_ids(list(updates))}
+        self._reschedule_polls(lock_ids, updates)
+        self._merge_lock_updates(self.open_state_data, updates, lock_ids)
+        for lock_id, state in updates.items():
+            self._record_reported_state(lock_id, state)
+
+        if self._snapshot_stale and updates:
+            # Live state has replaced the snapshot, even if the background revalidation failed
+            self._snapshot_stale = False
+            _LOGGER.info("✅ Replaced snapshot data with live state from the cloud")
+            self.async_update_listeners()
+
+    async def _async_probe_cloud(self):
+        """Send one cheap request (a single-entry lock list page) to see if the cloud is back."""
+        _LOGGER.debug("🔌 Probing the Sifely cloud")
+        try:
+            await self.api.async_get_key_list(page_no=1, page_size=1)
+        except SifelyApiError as e:
+            _LOGGER.debug("🔌 Probe failed: %s", e)
+
+    def _handle_circuit_change(self, state: str):
+        """Report a cloud outage once, and ramp polling back up when it ends.
+
+        Only locks without an error of their own get the outage error, and only
+        the outage error is cleared when the cloud comes back.
+        """
+        if self.api.breaker.is_open:
+            _LOGGER.warning("🔌 Sifely cloud unreachable; serving last known values and probing until it recovers")
+            for lock_id in self._lock_ids():
+                if lock_id not in self.cloud_errors:
+                    self.set_cloud_error(_CIRCUIT_OPEN_ERROR, lock_id)
+        else:
+            _LOGGER.info("🔌 Sifely cloud reachable again; resuming polling")
+            for lock_id, message in list(self.cloud_errors.items()):
+                if message == _CIRCUIT_OPEN_ERROR:
+                    self.clear_cloud_error(lock_id)
+            self._stagger_polls()
+        # Entities re-read is_stale
+        self.async_update_listeners()
+
+    def _stagger_polls(self):
+        """Spread the next state poll of every lock over CIRCUIT_RAMP_UP seconds."""
+        lock_ids = self._lock_ids()
+        now = self.hass.loop.time()
+        for index, lock_id in enumerate(lock_ids):
+            self._next_poll[lock_id] = now + CIRCUIT_RAMP_UP * index / max(len(lock_ids), 1)
+
+    def _record_reported_state(self, lock_id, state, fetch_history: bool = True):
+        """Remember the state the cloud reported for a lock and fire a transition if it flipped.
+
+        Compared against the previous cloud-reported state rather than
+        open_state_data, which may hold an optimistic value. A lock's first
+        known state isn't a transition.
+        """
+        previous = self._reported_state.get(lock_id)
+        self._reported_state[lock_id] = state
+        if previous is not None and previous != state:
+            self._handle_transition(lock_id, previous, state, fetch_history)
+
+    def _handle_transition(self, lock_id, old_state, new_state, fetch_history: bool = True):
+        """Fire a transition event for a lock whose state flipped and fetch its history soon."""
+        _LOGGER.debug("🔀 Lock %s changed state %s -> %s", lock_id, old_state, new_state)
+        self.hass.bus.async_fire(EVENT_LOCK_TRANSITION, {
+            "entry_id": self.config_entry.entry_id,
+            "lock_id": lock_id,
+            "old_state": old_state,
+            "new_state": new_state,
+        })
+        if fetch_history:
+            self.schedule_history_fetch(lock_id)
+
+    async def async_handle_push(self, lock_id: int, records: list[dict]) -> bool:
+        """Apply lock-event records pushed to the webhook (Sifely/TTLock callback format).
+
+        The lock's state is taken from the newest successful record with a known
+        lock/unlock recordType; if there is none, the lock is polled right away
+        instead. While a command for the lock is queued or running, the pushed
+        state is only remembered as the cloud-reported state (the rollback
+        target) and the command's optimistic state stays in place. Records
+        carrying a recordId are stored as history immediately, otherwise a
+        targeted history fetch is scheduled. Returns False for unknown locks.
+        """
+        if lock_id not in self.locks_by_id:
+            _LOGGER.debug("📬 Ignoring callback for unknown lock %s", lock_id)
+            return False
+
+        self.last_push = self.hass.loop.time()
+        self.pushes_received += 1
+
+        state = None
+        for record in sorted(records, key=lambda r: r.get("lockDate") or 0):
+            if record.get("success", 1) != 1:
+                continue
+            if record.get("recordType") in PUSH_LOCKED_RECORD_TYPES:
+                state = 0
+            elif record.get("recordType") in PUSH_UNLOCKED_RECORD_TYPES:
+                state = 1
+
+        if state is None:
+            self.mark_lock_active(lock_id)
+        else:
+            self._poll_interval[lock_id] = ADAPTIVE_POLL_CEILING
+            self._next_poll[lock_id] = self.hass.loop.time() + PUSH_RECONCILE_INTERVAL
+            if not self.command_queue.depth(lock_id):
+                self._merge_lock_updates(self.open_state_data, {lock_id: state}, [lock_id])
+            self._record_reported_state(lock_id, state, fetch_history=False)
+
+        with_ids = [record for record in records if record.get("recordId") is not None]
+        if with_ids:
+            entries = await store_lock_history(self, lock_id, with_ids, pushed=True)
+            async_dispatcher_send(self.hass, self.history_signal(lock_id), entries)
+        if len(with_ids) < len(records):
+            self.schedule_history_fetch(lock_id)
+
+        _LOGGER.debug("📬 Applied %d pushed record(s) for lock %s (state %s)", len(records), lock_id, state)
+        return True
+
+    def schedule_history_fetch(self, lock_id):
+        """Fetch one lock's history after HISTORY_FETCH_DEBOUNCE seconds.
+
+        Calling this again before then restarts the delay, so a burst of activity
+        on a lock costs one history request.
+        """
+        if unsub := self._history_fetch_unsubs.pop(lock_id, None):
+            unsub()
+
+        def _fetch(_now):
+            self._history_fetch_unsubs.pop(lock_id, None)
+            self.config_entry.async_create_background_task(
+                self.hass, self._async_fetch_history_after_transition(lock_id), f"sifely_cloud_history_{lock_id}"
+            )
+
+        self._history_fetch_unsubs[lock_id] = async_call_later(self.hass, HISTORY_FETCH_DEBOUNCE, _fetch)
+
+    async def _async_fetch_history_after_transition(self, lock_id):
+        try:
+            await self.async_update_lock_history(lock_id)
+        except Exception as e:
+            _LOGGER.warning("⚠️ Failed updating history for %s after a state change: %s", lock_id, e)
 
-                            if self._consecutive_401s >= TOKEN_401s_BEFOR_ALERT:
-                                if hasattr(self, "set_cloud_error"):
-                                    self.set_cloud_error(f"Exceeded {TOKEN_401s_BEFOR_ALERT} consecutive 401 errors. Token likely invalid.")
+    def cancel_history_fetches(self):
+        """Cancel pending debounced history fetches."""
+        for unsub in self._history_fetch_unsubs.values():
+            unsub()
+        self._history_fetch_unsubs = {}
 
-                        else:
-                            _LOGGER.warning("⚠️ HTTP %d when fetching state for %s: %s", resp.status, lock_id, text)
+    async def _async_query_open_state_for(self, lock_id):
+        """Query the open state of a single lock. Returns _NO_UPDATE if unavailable."""
+        try:
+            state = await self.api.async_query_open_state(lock_id)
+        except SifelyGatewayBusyError:
+            raise  # Retried by _async_fan_out
+        except SifelyCircuitOpenError:
+            return _NO_UPDATE  # Cloud outage, already reported once by _handle_circuit_change
+        except SifelyAuthError:
+            # Still 401 after the client's transparent refresh and replay
+            self._consecutive_401s += 1
+            _LOGGER.warning("⚠️ Received 401 (#%d) when fetching state for %s", self._consecutive_401s, lock_id)
+
+            if self._consecutive_401s == TOKEN_401s_BEFORE_REAUTH:
+                _LOGGER.warning(f"🔁 Detected {TOKEN_401s_BEFORE_REAUTH} consecutive 401s. Triggering token refresh...")
+                try:
+                    await self.token_manager.refresh_login_token()
+                except Exception as e:
+                    _LOGGER.warning("🚫 Re-login failed: %s", e)
 
-                    except Exception as e:
-                        _LOGGER.warning("❌ Failed to parse open state for %s: %s", lock_id, e)
+            if self._consecutive_401s >= TOKEN_401s_BEFOR_ALERT:
+                self.set_cloud_error(f"Exceeded {TOKEN_401s_BEFOR_ALERT} consecutive 401 errors. Token likely invalid.")
+            return _NO_UPDATE
+        except SifelyApiError as e:
+            if e.status == 200:
+                self._consecutive_401s = 0
+            _LOGGER.warning("🚫 Failed to fetch open state for %s: %s", lock_id, e)
+            return _NO_UPDATE
 
-            except Exception as e:
-                _LOGGER.warning("🚫 Failed to fetch open state for %s: %s", lock_id, e)
+        self._consecutive_401s = 0
+        self.clear_cloud_error(lock_id)
+        return state
 
     async def async_query_lock_details(self):
         """Query detailed lock info for each lock and store in self.details_data."""
         if not self.lock_list:
             _LOGGER.debug("⏩ Skipping lock detail polling: lock list not available")
             return
+        if self.api.breaker.is_open:
+            _LOGGER.debug("⏩ Skipping lock detail polling: Sifely cloud unreachable")
+            return
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
+        await self.async_query_lock_gateways()
+        lock_ids = self._lock_ids()
+        updates = await self._async_fan_out(self._async_query_lock_details_for, lock_ids)
+        self._merge_lock_updates(self.details_data, updates, lock_ids)
 
-        for lock in self.lock_list:
-            lock_id = lock.get("lockId")
-            if not lock_id:
-                _LOGGER.warning("🔑 Skipping lock with missing lockId: %s", lock)
-                continue
+    async def async_query_lock_gateways(self):
+        """Look up the gateway of each lock whose gateway isn't known yet.
 
-            url = f"{LOCK_DETAIL_ENDPOINT}?lockId={lock_id}"
-            try:
-                async with self.session.get(url, headers=headers) as resp:
-                    text = await resp.text()
-                    _LOGGER.debug("🔍 Lock detail response for %s: %s", lock_id, text)
-
-                    try:
-                        data = json.loads(text)
-
-                        if resp.status == 200:
-                            if "code" in data:
-                                if data.get("code") == 200:
-                                    self.details_data[lock_id] = data.get("data", {})
-                                elif data.get("code") == -3003:
-                                    _LOGGER.debug("⏳ Gateway busy when querying details for %s. Will retry.", lock_id)
-                                else:
-                                    _LOGGER.warning("⚠️ Unexpected lock detail for %s: %s", lock_id, data)
-
-                            elif "lockId" in data:
-                                self.details_data[lock_id] = data
-                            else:
-                                _LOGGER.warning("⚠️ Unknown lock detail format for %s: %s", lock_id, data)
-                        else:
-                            _LOGGER.warning("⚠️ HTTP %d when fetching details for %s: %s", resp.status, lock_id, text)
-
-                    except Exception as e:
-                        _LOGGER.warning("❌ Failed to parse lock detail for %s: %s", lock_id, e)
+        A lock paired with several gateways is grouped under the one with the
+        strongest signal. Locks without a gateway (or whose lookup failed for
+        a reason other than a busy gateway) are stored as None and not asked again.
+        """
+        lock_ids = [lock_id for lock_id in self._lock_ids() if lock_id not in self.lock_gateways]
+        if lock_ids:
+            self.lock_gateways.update(await self._async_fan_out(self._async_query_lock_gateway_for, lock_ids))
 
-            except Exception as e:
-                _LOGGER.warning("🚫 Failed to fetch lock detail for %s: %s", lock_id, e)
+    async def _async_query_lock_gateway_for(self, lock_id):
+        """Return the gatewayId a lock is reached through, or None."""
+        try:
+            gateways = await self.api.async_get_lock_gateways(lock_id)
+        except SifelyGatewayBusyError:
+            raise  # Retried by _async_fan_out
+        except SifelyCircuitOpenError:
+            return _NO_UPDATE
+        except SifelyApiError as e:
+            _LOGGER.debug("📡 No gateway list for %s, falling back to lock details: %s", lock_id, e)
+            return None
+        gateways = [gateway for gateway in gateways if gateway.get("gatewayId") is not None]
+        if not gateways:
+            return None
+        return max(gateways, key=lambda gateway: gateway.get("rssi") or -999)["gatewayId"]
+
+    async def _async_query_lock_details_for(self, lock_id):
+        """Query the details of a single lock. Returns _NO_UPDATE if unavailable."""
+        try:
+            return await self.api.async_get_lock_detail(lock_id)
+        except SifelyGatewayBusyError:
+            raise  # Retried by _async_fan_out
+        except SifelyCircuitOpenError:
+            return _NO_UPDATE
+        except SifelyApiError as e:
+            _LOGGER.warning("🚫 Failed to fetch lock detail for %s: %s", lock_id, e)
+        return _NO_UPDATE
 
     async def async_send_lock_command(self, lock_id: int, lock: bool) -> bool:
-        """Send a lock or unlock command to a specific lock."""
-        endpoint = LOCK_ENDPOINT if lock else UNLOCK_ENDPOINT
-        url = f"{endpoint}?lockId={lock_id}"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
+        """Send a lock or unlock command, retrying failures with exponential backoff.
+
+        A -3003 (gateway busy) answer backs off at least GATEWAY_BUSY_BACKOFF.
+        Retries stop early once a different command for the lock is queued.
+        """
+        action = "lock" if lock else "unlock"
+        delay = COMMAND_RETRY_BACKOFF
 
         for attempt in range(1, LOCK_REQUEST_RETRIES + 1):
             try:
-                async with self.session.post(url, headers=headers) as resp:
-                    text = await resp.text()
-                    _LOGGER.debug("🔐 Lock command response (attempt %d) for %s: %s", attempt, lock_id, text)
-
-                    try:
-                        result = json.loads(text)
-                        if resp.status == 200 and result.get("errcode") == 0:
-                            _LOGGER.info("✅ Successfully sent %s command to lock %s", "lock" if lock else "unlock", lock_id)
-                            return True
-                        else:
-                            _LOGGER.warning("⚠️ Failed to %s lock %s (attempt %d): %s", "lock" if lock else "unlock", lock_id, attempt, result)
-                    except Exception as e:
-                        _LOGGER.warning("❌ Failed to parse %s response for lock %s: %s", "lock" if lock else "unlock", lock_id, e)
-
-            except Exception as e:
-                _LOGGER.warning("🚫 Request error on %s command attempt %d for lock %s: %s", "lock" if lock else "unlock", attempt, lock_id, e)
+                await self.api.async_send_command(lock_id, lock)
+                _LOGGER.info("✅ Successfully sent %s command to lock %s", action, lock_id)
+                return True
+            except SifelyCircuitOpenError as e:
+                _LOGGER.warning("🔌 Cannot %s lock %s: %s", action, lock_id, e)
+                return False
+            except SifelyGatewayBusyError as e:
+                delay = max(delay, GATEWAY_BUSY_BACKOFF)
+                _LOGGER.warning("⏳ Gateway busy for %s of lock %s (attempt %d): %s", action, lock_id, attempt, e)
+            except SifelyApiError as e:
+                _LOGGER.warning("⚠️ Failed to %s lock %s (attempt %d): %s", action, lock_id, attempt, e)
+
+            if attempt == LOCK_REQUEST_RETRIES:
+                break
+            if self.command_queue.pending_intent(lock_id) not in (None, lock):
+                _LOGGER.info("🔀 Dropping %s retries for lock %s: a newer command is queued", action, lock_id)
+                break
+            self.command_queue.retries += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, COMMAND_RETRY_MAX_BACKOFF)
 
         return False  # All retries failed
 
-    async def async_query_lock_history(self, lock_id: int) -> list:
-        """Fetch lock history records for a given lock."""
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-
-        url = f"{LOCK_HISTORY_ENDPOINT}?lockId={lock_id}&pageNo=1&pageSize={HISTORY_DISPLAY_LIMIT}"
+    async def async_confirmed_lock_command(self, lock_id: int, lock: bool) -> bool:
+        """Queue a lock/unlock command, showing the new state right away.
+
+        The expected state is set optimistically and the command goes through the
+        lock's command queue (see _async_execute_lock_command). Returns False if
+        the command failed or wasn't confirmed; a command replaced by a newer one
+        before it ran counts as done.
+        """
+        self.open_state_data[lock_id] = 0 if lock else 1  # Sifely: 0 = locked, 1 = unlocked
+        self._notify_locks([lock_id])
+
+        return await self.command_queue.async_submit(lock_id, lock) is not False
+
+    async def _async_execute_lock_command(self, lock_id: int, lock: bool) -> bool:
+        """Send a queued command and confirm it by polling only the target lock.
+
+        The lock is polled (up to COMMAND_VERIFY_ATTEMPTS times) until
+        queryOpenState reports the new state. If the command fails or is never
+        confirmed, the state is rolled back, the lock's error sensor is set and
+        False is returned.
+        """
+        action = "lock" if lock else "unlock"
+        expected = 0 if lock else 1
+
+        if await self.async_send_lock_command(lock_id, lock):
+            for attempt in range(1, COMMAND_VERIFY_ATTEMPTS + 1):
+                await asyncio.sleep(COMMAND_VERIFY_INTERVAL)
+                try:
+                    state = await self._async_query_open_state_for(lock_id)
+                except SifelyGatewayBusyError:
+                    _LOGGER.debug("⏳ Gateway busy while confirming %s of %s (attempt %d)", action, lock_id, attempt)
+                    continue
+                if state is _NO_UPDATE:
+                    continue
+                if state == expected:
+                    _LOGGER.info("✅ Lock %s confirmed %sed after %d poll(s)", lock_id, action, attempt)
+                    self._apply_confirmed_state(lock_id, expected)
+                    return True
+                self._record_reported_state(lock_id, state)
+
+        return self._fail_command(lock_id, action)
+
+    def _fail_command(self, lock_id, action: str) -> bool:
+        """Report a failed or unconfirmed command and roll back its optimistic state.
+
+        The state is left alone if another command for the lock is already
+        queued, since that one has put its own optimistic state in place.
+        Returns False.
+        """
+        self.set_cloud_error(f"Failed to confirm {action} command", lock_id)
+        if self.command_queue.pending_intent(lock_id) is not None:
+            _LOGGER.warning("🚫 Could not confirm %s of lock %s", action, lock_id)
+            return False
+
+        # Fall back to the last state the cloud reported
+        rollback = self._reported_state.get(lock_id)
+        if rollback is None:
+            self.open_state_data.pop(lock_id, None)
+        else:
+            self.open_state_data[lock_id] = rollback
+        self._notify_locks([lock_id])
+        _LOGGER.warning("🚫 Could not confirm %s of lock %s, rolled back state", action, lock_id)
+        return False
+
+    def _apply_confirmed_state(self, lock_id, state):
+        """Store the state the cloud confirmed after a command and resume fast polling.
+
+        Fires the transition event if the lock actually changed state.
+        """
+        if not self._merge_lock_updates(self.open_state_data, {lock_id: state}, []):
+            self._schedule_snapshot_save()
+        self._record_reported_state(lock_id, state, fetch_history=False)
+        # Only now, so the adaptive sweep can't race the command's own verification
+        self.mark_lock_active(lock_id)
+        self.schedule_history_fetch(lock_id)
+
+    async def async_bulk_lock_command(self, lock_ids: list, lock: bool) -> dict:
+        """Lock or unlock many locks at once and confirm them in combined sweeps.
+
+        Every command goes through its lock's command queue, so it's ordered,
+        deduplicated and rolled back like a single command. Sends are spread as
+        in _async_fan_out (one per gateway at a time, at most
+        MAX_CONCURRENT_REQUESTS in parallel), and sent commands are confirmed
+        together by sweeps that poll only the still-unconfirmed locks. Returns
+        {lock_id: "confirmed" | "unconfirmed" | "failed" | "superseded"}, where
+        superseded means a newer command for the lock replaced this one.
+        """
+        action = "lock" if lock else "unlock"
+        expected = 0 if lock else 1
+        outcome = {}
+        verifying = {}  # lock_id -> [future, sweeps left]
+        sweeper = None
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        gateway_locks = {}
+        for group in self._gateway_groups(lock_ids):
+            gateway_lock = asyncio.Lock()
+            gateway_locks.update({lock_id: gateway_lock for lock_id in group})
+
+        async def _sweep():
+            nonlocal sweeper
+            sweep = 0
+            try:
+                while verifying:
+                    await asyncio.sleep(COMMAND_VERIFY_INTERVAL)
+                    sweep += 1
+                    polled = list(verifying)
+                    states = await self._async_fan_out(self._async_query_open_state_for, polled)
+                    for lock_id in polled:
+                        state = states.get(lock_id, _NO_UPDATE)
+                        waiter = verifying[lock_id]
+                        waiter[1] -= 1
+                        if state == expected or not waiter[1]:
+                            del verifying[lock_id]
+                            waiter[0].set_result(state == expected)
+                        elif state is not _NO_UPDATE:
+                            self._record_reported_state(lock_id, state)
+                    _LOGGER.debug("🔎 Bulk %s sweep %d: %d lock(s) still unconfirmed", action, sweep, len(verifying))
+            finally:
+                sweeper = None
+                for future, _ in verifying.values():
+                    if not future.done():
+                        future.set_result(False)
+                verifying.clear()
+
+        async def _execute(lock_id, _lock):
+            """Queue worker for one lock of the bulk command: send, then join the shared sweeps."""
+            nonlocal sweeper
+            async with gateway_locks[lock_id], semaphore:
+                sent = await self.async_send_lock_command(lock_id, lock)
+            if not sent:
+                outcome[lock_id] = "failed"
+                return self._fail_command(lock_id, action)
+
+            future = self.hass.loop.create_future()
+            verifying[lock_id] = [future, COMMAND_VERIFY_ATTEMPTS]
+            if sweeper is None:
+                sweeper = self.config_entry.async_create_background_task(
+                    self.hass, _sweep(), f"sifely_cloud_bulk_{action}"
+                )
+            if await future:
+                outcome[lock_id] = "confirmed"
+                self._apply_confirmed_state(lock_id, expected)
+                return True
+            outcome[lock_id] = "unconfirmed"
+            return self._fail_command(lock_id, action)
+
+        async def _submit(lock_id):
+            result = await self.command_queue.async_submit(lock_id, lock, _execute)
+            if lock_id in outcome:
+                return lock_id, outcome[lock_id]
+            # Collapsed into another queued command (True/False), or replaced by a newer one (None)
+            return lock_id, {True: "confirmed", False: "failed"}.get(result, "superseded")
+
+        for lock_id in lock_ids:
+            self.open_state_data[lock_id] = expected
+        self._notify_locks(lock_ids)
+
+        results = dict(await asyncio.gather(*(_submit(lock_id) for lock_id in lock_ids)))
+        _LOGGER.info(
+            "✅ Bulk %s: %d of %d lock(s) confirmed",
+            action, sum(result == "confirmed" for result in results.values()), len(lock_ids),
+        )
+        return results
 
+    async def async_query_lock_history(self, lock_id: int, page_no: int = 1, page_size: int = HISTORY_DISPLAY_LIMIT) -> list:
+        """Fetch one page of lock history records (newest first) for a given lock."""
         try:
-            async with self.session.get(url, headers=headers) as resp:
-                text = await resp.text()
-                _LOGGER.debug("📜 Lock history response for %s: %s", lock_id, text)
-
-                data = json.loads(text)
-                if resp.status == 200 and "list" in data:
-                    return data["list"]
-                else:
-                    _LOGGER.warning("⚠️ Unexpected lock history for %s: %s", lock_id, data)
-                    return []
-
-        except Exception as e:
+            return await self.api.async_get_lock_records(lock_id, page_no, page_size)
+        except SifelyApiError as e:
             _LOGGER.warning("❌ Failed to fetch lock history for %s: %s", lock_id, e)
             return []
 
-    def set_cloud_error(self, message: str):
-        """Set the error sensor to an alert state."""
-        if hasattr(self, "error_sensor") and self.error_sensor:
-            self.error_sensor.native_value = "Error"
-            self.error_sensor._attr_extra_state_attributes["last_error"] = message
-
-            if self.error_sensor.hass:
-                self.error_sensor.async_schedule_update_ha_state()
-            else:
-                _LOGGER.warning("⚠️ Cannot update error sensor — hass is None")
+    async def async_load_snapshot(self) -> bool:
+        """Restore lock_list, details_data and open_state_data from the last snapshot.
+
+        Returns True if a snapshot was found; the restored data is marked stale
+        until async_revalidate() has refreshed it from the cloud.
+        """
+        snapshot = await self._snapshot_store.async_load()
+        if not snapshot or not snapshot.get("lock_list"):
+            return False
+
+        self._set_lock_list(snapshot["lock_list"])
+        self.details_data = {int(k): v for k, v in snapshot.get("details_data", {}).items()}
+        self.open_state_data = {int(k): v for k, v in snapshot.get("open_state_data", {}).items()}
+        self._reported_state = dict(self.open_state_data)
+        self._snapshot_stale = True
+        _LOGGER.info("💾 Restored %d locks from snapshot", len(self.lock_list))
+        return True
+
+    def _snapshot_data(self) -> dict:
+        return {
+            "lock_list": self.lock_list,
+            "details_data": {str(k): v for k, v in self.details_data.items()},
+            "open_state_data": {str(k): v for k, v in self.open_state_data.items()},
+        }
 
-    def clear_cloud_error(self):
-        """Clear the error sensor state."""
-        if hasattr(self, "error_sensor") and self.error_sensor:
-            self.error_sensor.native_value = "OK"
-            self.error_sensor._attr_extra_state_attributes = {}
+    def _schedule_snapshot_save(self):
+        self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
 
-            if self.error_sensor.hass:
-                self.error_sensor.async_schedule_update_ha_state()
-            else:
-                _LOGGER.warning("⚠️ Cannot clear error sensor — hass is None")
+    async def async_revalidate(self):
+        """Refresh snapshot data from the cloud in the background after a warm start."""
+        try:
+            await self.token_manager.initialize()
+            known = set(self._lock_ids())
+            await self.async_fetch_lock_list()
+            if set(self._lock_ids()) != known:
+                _LOGGER.info("🔄 Lock list changed since the last snapshot; reload the integration to update entities")
+            self.data = self.lock_list
+            await self.async_query_lock_details()
+            await self.async_query_open_state(force=True)
+            self._snapshot_stale = False
+            self.async_update_listeners()
+            _LOGGER.info("✅ Revalidated snapshot data from the cloud")
+        except Exception as e:
+            _LOGGER.warning("⚠️ Failed to revalidate snapshot data; it stays marked stale until the next successful poll: %s", e)
+
+    async def async_open_history_store(self):
+        """Open the history database and load the per-lock high-water marks from it."""
+        await self.hass.async_add_executor_job(self.history_store.open)
+        self.history_marks = await self.hass.async_add_executor_job(self.history_store.marks)
+
+    async def async_migrate_legacy_history(self):
+        """Import this entry's legacy CSV history files into the database."""
+        if await self.hass.async_add_executor_job(self.history_store.migrate_csv, self._lock_ids()):
+            self.history_marks = await self.hass.async_add_executor_job(self.history_store.marks)
+
+    async def async_close_history_store(self):
+        """Close the history database."""
+        await self.hass.async_add_executor_job(self.history_store.close)
+
+    def update_history_mark(self, lock_id: int, record: dict):
+        """Advance the in-memory high-water mark of a lock to the given (newest) record."""
+        self.history_marks[lock_id] = {
+            "recordId": record.get("recordId"),
+            "lockDate": record.get("lockDate"),
+        }
 
+    def set_cloud_error(self, message: str, lock_id=None):
+        """Put the error sensor of a lock (or of every lock) into an alert state."""
+        for target in [lock_id] if lock_id is not None else self._lock_ids():
+            self.cloud_errors[target] = message
+            async_dispatcher_send(self.hass, self.error_signal(target), message)
+
+    def clear_cloud_error(self, lock_id=None):
+        """Clear the error sensor of a lock (or of every lock)."""
+        for target in [lock_id] if lock_id is not None else self._lock_ids():
+            self.cloud_errors.pop(target, None)
+            async_dispatcher_send(self.hass, self.error_signal(target), None)
+
+    def error_signal(self, lock_id) -> str:
+        """Return the dispatcher signal carrying a lock's cloud error (None clears it)."""
+        return SIGNAL_CLOUD_ERROR.format(self.config_entry.entry_id, lock_id)
+
+    def history_signal(self, lock_id) -> str:
+        """Return the dispatcher signal carrying a lock's latest history entries."""
+        return SIGNAL_HISTORY_UPDATED.format(self.config_entry.entry_id, lock_id)
+
+    async def async_update_lock_history(self, lock_id):
+        """Sync one lock's history and push the result to its history sensor."""
+        entries = await fetch_and_update_lock_history(self, lock_id)
+        async_dispatcher_send(self.hass, self.history_signal(lock_id), entries)
+        return entries
+
+    async def async_update_all_history(self):
+        """Sync history for every lock in one sweep."""
+        if self.api.breaker.is_open:
+            _LOGGER.debug("⏩ Skipping history sweep: Sifely cloud unreachable")
+            return
+        for lock_id in self._lock_ids():
+            try:
+                await self.async_update_lock_history(lock_id)
+            except Exception as e:
+                _LOGGER.warning("⚠️ Failed updating history for %s: %s", lock_id, e)
 
 
 async def setup_sifely_coordinator(
@@ -306,46 +914,61 @@ async def setup_sifely_coordinator(
     token_manager: SifelyTokenManager,
     config_entry,
 ) -> SifelyCoordinator:
-    """Initialize, refresh, and store the coordinator."""
+    """Initialize and refresh the coordinator of one config entry (account).
+
+    With a saved snapshot, entities are created from it right away and the token,
+    lock list, details and state are revalidated in the background. Without one
+    (first start), setup waits for the cloud as before.
+    """
     coordinator = SifelyCoordinator(hass, token_manager, config_entry)
+    await coordinator.async_open_history_store()
+
+    if await coordinator.async_load_snapshot():
+        coordinator.data = coordinator.lock_list
+        revalidate = coordinator.async_revalidate()
+    else:
+        await token_manager.initialize()
+        if not token_manager.access_token:
+            raise UpdateFailed("❌ Could not retrieve valid login token.")
 
-    # 📡 Step 1: Fetch initial lock list
-    locks = await coordinator.async_fetch_lock_list()
-    coordinator.data = locks  # 🔥 Set initial data for entities
+        # 📡 Step 1: Fetch initial lock list
+        locks = await coordinator.async_fetch_lock_list()
+        coordinator.data = locks  # 🔥 Set initial data for entities
 
-    # 🔋 Step 2: Immediately fetch lock details (so battery sensors are ready)
-    await coordinator.async_query_lock_details()
+        # 🔋 Step 2: Immediately fetch lock details (so battery sensors are ready)
+        await coordinator.async_query_lock_details()
+        revalidate = None
 
-    # 💾 Register the coordinator globally
-    hass.data.setdefault(DOMAIN, {})["coordinator"] = coordinator
+    # Needs the lock list, so each account only picks up its own locks' files
+    await coordinator.async_migrate_legacy_history()
 
     # ⏱️ Step 3: Schedule ongoing polling for lock details and open state
-    async def _run_lock_details(now):
+    async def _run_lock_details():
         _LOGGER.debug("⏱️ Scheduled task: Fetching lock details")
         await coordinator.async_query_lock_details()
 
-    async def _run_open_state(now):
+    async def _run_open_state():
         _LOGGER.debug("⏱️ Scheduled task: Fetching open/closed state")
         await coordinator.async_query_open_state()
 
-    async def _run_history_update(now):
+    async def _run_history_update():
         _LOGGER.debug("⏱️ Scheduled task: Fetching lock history diffs")
-
-        for lock in coordinator.lock_list:
-            lock_id = lock.get("lockId")
-            if not lock_id:
-                continue
-
-            try:
-                entries = await fetch_and_update_lock_history(coordinator, lock_id)
-                if hasattr(coordinator, "update_history_sensor"):
-                    await coordinator.update_history_sensor(lock_id, entries)
-            except Exception as e:
-                _LOGGER.warning("⚠️ Failed updating history for %s: %s", lock_id, e)
-
-
-    async_track_time_interval(hass, _run_lock_details, timedelta(seconds=DETAILS_UPDATE_INTERVAL))
-    async_track_time_interval(hass, _run_open_state, timedelta(seconds=STATE_QUERY_INTERVAL))
-    async_track_time_interval(hass, _run_history_update, timedelta(seconds=HISTORY_INTERVAL))
+        await coordinator.async_update_all_history()
+
+    def _start_polling():
+        coordinator.scheduler.async_add_job("lock_details", _run_lock_details, DETAILS_UPDATE_INTERVAL)
+        coordinator.scheduler.async_add_job("open_state", _run_open_state, ADAPTIVE_POLL_FLOOR)
+        coordinator.scheduler.async_add_job("history", _run_history_update, HISTORY_INTERVAL)
+        # Fill the history sensors now instead of waiting for the first hourly sweep
+        config_entry.async_create_background_task(hass, _run_history_update(), "sifely_cloud_initial_history")
+
+    if revalidate is None:
+        _start_polling()
+    else:
+        async def _revalidate_then_poll():
+            await revalidate
+            _start_polling()
+
+        config_entry.async_create_background_task(hass, _revalidate_then_poll(), "sifely_cloud_revalidate")
 
     return coordinator
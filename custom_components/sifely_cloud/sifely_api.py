@@ -1,41 +1,275 @@
 # sifely_api.py
-import aiohttp
+import asyncio
+import json
 import logging
-from .const import TOKEN_ENDPOINT
-from .token_manager import save_token
+import time
+
+import aiohttp
+
+from .const import (
+    API_BASE_URL,
+    TOKEN_ENDPOINT,
+    REFRESH_ENDPOINT,
+    KEYLIST_ENDPOINT,
+    LOCK_DETAIL_ENDPOINT,
+    QUERY_STATE_ENDPOINT,
+    LOCK_ENDPOINT,
+    UNLOCK_ENDPOINT,
+    LOCK_HISTORY_ENDPOINT,
+    LOCK_GATEWAYS_ENDPOINT,
+    REQUEST_TIMEOUT,
+    API_REQUEST_RETRIES,
+    API_RETRY_BACKOFF,
+    PRIORITY_COMMAND,
+    PRIORITY_STATE,
+    PRIORITY_BACKGROUND,
+)
+from .metrics import SifelyApiMetrics
+from .circuit_breaker import SifelyCircuitBreaker
 
 _LOGGER = logging.getLogger(__name__)
 
-async def get_token(email, password, client_id, client_secret):
-    payload = {
-        "email": email,
-        "password": password,
-        "clientId": client_id,
-        "clientSecret": client_secret
-    }
+GATEWAY_BUSY_CODE = -3003
+
+# Rate limiter priority per endpoint; anything else is PRIORITY_BACKGROUND
+ENDPOINT_PRIORITIES = {
+    TOKEN_ENDPOINT: PRIORITY_COMMAND,
+    REFRESH_ENDPOINT: PRIORITY_COMMAND,
+    LOCK_ENDPOINT: PRIORITY_COMMAND,
+    UNLOCK_ENDPOINT: PRIORITY_COMMAND,
+    QUERY_STATE_ENDPOINT: PRIORITY_STATE,
+}
+
+
+class SifelyApiError(Exception):
+    """Raised when a Sifely cloud request fails or returns an error envelope."""
+
+    def __init__(self, message: str, status: int | None = None, code: int | None = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class SifelyAuthError(SifelyApiError):
+    """Raised when a request is still rejected with 401 after a token refresh."""
+
+
+class SifelyGatewayBusyError(SifelyApiError):
+    """Raised when the cloud reports the lock's gateway as busy (code -3003)."""
+
+
+class SifelyCircuitOpenError(SifelyApiError):
+    """Raised without sending a request while the circuit breaker is open."""
+
+
+class SifelyApiClient:
+    """Client for the Sifely cloud API.
+
+    Owns the shared (pooled) aiohttp session and the request pipeline used by every
+    caller: bearer auth from the token manager with a single refresh-and-replay on
+    401, per-request timeouts, retries of transient failures, decoding of the
+    code/errcode/list response envelopes into plain results or SifelyApiError,
+    per-endpoint metrics, and an optional prioritized rate limiter shared with the
+    clients of other config entries (see ENDPOINT_PRIORITIES). A circuit breaker
+    fails requests fast while the cloud is unreachable.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str = API_BASE_URL, rate_limiter=None):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.rate_limiter = rate_limiter
+        self.token_manager = None
+        self.metrics = SifelyApiMetrics()
+        self.breaker = SifelyCircuitBreaker()
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    def _headers(self, token: str | None) -> dict:
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return headers
+
+    async def _async_send(self, method: str, url: str, token: str | None, params: dict | None) -> tuple[int, str]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(ENDPOINT_PRIORITIES.get(url, PRIORITY_BACKGROUND))
 
-    headers = {
-        "Content-Type": "application/json"
-    }
+        # Endpoint constants are absolute; rebase them so the client can target another host
+        if self.base_url != API_BASE_URL and url.startswith(API_BASE_URL):
+            url = self.base_url + url[len(API_BASE_URL):]
 
-    _LOGGER.debug("Requesting token from Sifely API...")
-    _LOGGER.debug(f"Payload: {payload}")
+        async with self.session.request(
+            method, url, headers=self._headers(token), params=params, timeout=self._timeout
+        ) as resp:
+            if resp.status == 429 and self.rate_limiter is not None:
+                self.rate_limiter.penalize("HTTP 429")
+            return resp.status, await resp.text()
+
+    async def _async_send_with_retry(self, method: str, url: str, token: str | None, params: dict | None, retries: int) -> tuple[int, str]:
+        """Send a request, retrying transport errors, timeouts, 429 and 5xx responses with backoff."""
+        delay = API_RETRY_BACKOFF
+        for attempt in range(retries + 1):
+            try:
+                status, text = await self._async_send(method, url, token, params)
+                if (status < 500 and status != 429) or attempt == retries:
+                    return status, text
+                _LOGGER.debug("🔁 HTTP %d from %s, retrying in %.1fs", status, url, delay)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == retries:
+                    raise SifelyApiError(f"Request to {url} failed: {e!r}") from e
+                _LOGGER.debug("🔁 Request to %s failed (%r), retrying in %.1fs", url, e, delay)
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    async def async_request(
+        self,
+        method: str,
+        url: str,
+        params: dict | None = None,
+        auth: bool = True,
+        retries: int = API_REQUEST_RETRIES,
+    ) -> dict:
+        """Send a request and return the decoded JSON body, raising SifelyApiError on failure."""
+        if not self.breaker.allow_request():
+            raise SifelyCircuitOpenError("Sifely cloud unreachable, request not sent")
+
+        started = time.monotonic()
+        try:
+            token = self.token_manager.access_token if auth else None
+            status, text = await self._async_send_with_retry(method, url, token, params, retries)
+
+            if status == 401 and auth:
+                if self.token_manager.access_token == token:
+                    _LOGGER.debug("🔁 Received 401 for %s, refreshing token and replaying", url)
+                    try:
+                        await self.token_manager.async_refresh_access_token()
+                    except Exception as e:
+                        raise SifelyAuthError(f"Token refresh after 401 failed: {e}", status=status) from e
+                status, text = await self._async_send_with_retry(method, url, self.token_manager.access_token, params, retries)
+
+            _LOGGER.debug("📨 %s %s -> %d: %s", method, url, status, text)
+            data = self._decode(status, text)
+        except SifelyApiError as e:
+            # Only an unreachable or failing host counts; any other answer shows it's up
+            if e.status is None or e.status >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if isinstance(e, SifelyGatewayBusyError) and self.rate_limiter is not None:
+                self.rate_limiter.penalize("gateway busy")
+            self.metrics.record(
+                url, time.monotonic() - started, status=e.status, code=e.code,
+                error=True, busy=isinstance(e, SifelyGatewayBusyError),
+            )
+            raise
+        except Exception:
+            # Failed unexpectedly: without an answer this can't count as success, and a
+            # probe must not leave the circuit half-open. Cancellation (unloads, aborted
+            # sweeps) isn't a cloud failure; a cancelled probe times out in the breaker.
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        self.metrics.record(url, time.monotonic() - started, status=status)
+        return data
+
+    @staticmethod
+    def _decode(status: int, text: str) -> dict:
+        """Decode a response body and check its code/errcode envelope."""
+        if status == 401:
+            raise SifelyAuthError("Unauthorized (401)", status=status)
+        if status != 200:
+            raise SifelyApiError(f"HTTP {status}: {text}", status=status)
 
-    async with aiohttp.ClientSession() as session:
         try:
-            async with session.post(TOKEN_ENDPOINT, json=payload, headers=headers) as resp:
-                _LOGGER.debug(f"Response status: {resp.status}")
-                text = await resp.text()
-                _LOGGER.debug(f"Raw response text: {text}")
-
-                if resp.status != 200:
-                    _LOGGER.error("Token request failed with status %s", resp.status)
-                    return None
-
-                data = await resp.json()
-                save_token(data)
-                _LOGGER.info("Token successfully retrieved and saved.")
-                return data
-        except Exception as e:
-            _LOGGER.exception(f"Exception while retrieving token: {e}")
-            return None
+            data = json.loads(text)
+        except ValueError as e:
+            raise SifelyApiError(f"Invalid JSON response: {e}", status=status) from e
+
+        if not isinstance(data, dict):
+            raise SifelyApiError(f"Unexpected response: {data}", status=status)
+
+        code = data.get("code", data.get("errcode"))
+        if code == GATEWAY_BUSY_CODE:
+            raise SifelyGatewayBusyError("Gateway busy", status=status, code=code)
+        if "code" in data and code != 200:
+            raise SifelyApiError(f"API error {code}: {data}", status=status, code=code)
+        if "errcode" in data and code != 0:
+            raise SifelyApiError(f"API error {code}: {data}", status=status, code=code)
+
+        return data
+
+    async def async_login(self, client_id: str, username: str, password: str) -> dict:
+        """Log in with account credentials. Returns the login data (token, refreshToken)."""
+        data = await self.async_request("POST", TOKEN_ENDPOINT, params={
+            "client_id": client_id,
+            "username": username,
+            "password": password,
+        }, auth=False)
+        if "data" not in data:
+            raise SifelyApiError(f"Login failed: {data}")
+        return data["data"]
+
+    async def async_refresh_token(self, client_id: str, refresh_token: str) -> dict:
+        """Exchange a refresh token for an access token. Returns the OAuth token payload."""
+        data = await self.async_request("POST", REFRESH_ENDPOINT, params={
+            "client_id": client_id,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        }, auth=False)
+        if "access_token" not in data:
+            raise SifelyApiError(f"Refresh failed: {data}")
+        return data
+
+    async def async_get_key_list(self, page_no: int, page_size: int) -> dict:
+        """Return one page of the account's locks (keys).
+
+        The result holds the page's "list" plus the paging fields ("pages", "total")
+        when the cloud provides them.
+        """
+        data = await self.async_request("POST", KEYLIST_ENDPOINT, params={"pageNo": page_no, "pageSize": page_size})
+        if "list" not in data:
+            raise SifelyApiError(f"Unexpected lock list response: {data}")
+        return data
+
+    async def async_get_lock_detail(self, lock_id: int) -> dict:
+        """Return the detail record of a lock."""
+        data = await self.async_request("GET", LOCK_DETAIL_ENDPOINT, params={"lockId": lock_id})
+        if "code" in data:
+            return data.get("data", {})
+        if "lockId" in data:
+            return data
+        raise SifelyApiError(f"Unknown lock detail format: {data}")
+
+    async def async_query_open_state(self, lock_id: int) -> int | None:
+        """Return the open state of a lock (0 = locked, 1 = unlocked)."""
+        data = await self.async_request("GET", QUERY_STATE_ENDPOINT, params={"lockId": lock_id})
+        if "code" in data:
+            return data.get("data", {}).get("state")
+        if "state" in data:
+            return data.get("state")
+        raise SifelyApiError(f"Unknown open state format: {data}")
+
+    async def async_send_command(self, lock_id: int, lock: bool) -> None:
+        """Send a lock or unlock command. Commands are not retried at this layer."""
+        endpoint = LOCK_ENDPOINT if lock else UNLOCK_ENDPOINT
+        data = await self.async_request("POST", endpoint, params={"lockId": lock_id}, retries=0)
+        if data.get("errcode") != 0:
+            raise SifelyApiError(f"Command rejected: {data}", code=data.get("errcode"))
+
+    async def async_get_lock_gateways(self, lock_id: int) -> list[dict]:
+        """Return the gateways a lock is paired with (gatewayId, gatewayMac, rssi, ...)."""
+        data = await self.async_request("GET", LOCK_GATEWAYS_ENDPOINT, params={"lockId": lock_id})
+        if "list" not in data:
+            raise SifelyApiError(f"Unexpected lock gateway response: {data}")
+        return data["list"]
+
+    async def async_get_lock_records(self, lock_id: int, page_no: int, page_size: int) -> list[dict]:
+        """Return one page of lock history records, newest first."""
+        data = await self.async_request("GET", LOCK_HISTORY_ENDPOINT, params={
+            "lockId": lock_id,
+            "pageNo": page_no,
+            "pageSize": page_size,
+        })
+        if "list" not in data:
+            raise SifelyApiError(f"Unexpected lock history response: {data}")
+        return data["list"]
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
 
@@ -7,16 +8,20 @@ from .const import (
     TOKEN_ENDPOINT,
     REFRESH_ENDPOINT,
     TOKEN_REFRESH_BUFFER_MINUTES,
+    TOKEN_REFRESH_RETRIES,
+    TOKEN_REFRESH_BACKOFF,
+    TOKEN_REFRESH_MAX_BACKOFF,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 class SifelyTokenManager:
-    def __init__(self, client_id, email, password, session, hass, config_entry):
+    def __init__(self, client_id, email, password, api, hass, config_entry):
         self.client_id = client_id
         self.email = email
         self.password = password
-        self.session = session
+        self.api = api
+        api.token_manager = self
         self.hass = hass
         self.config_entry = config_entry
 
@@ -26,6 +31,7 @@ class SifelyTokenManager:
         self._login_token = None
 
         self._refresh_unsub = None
+        self._refresh_task = None
 
     async def initialize(self):
         """Entry point on integration boot."""
@@ -36,8 +42,7 @@ class SifelyTokenManager:
             self._schedule_token_refresh()
         else:
             _LOGGER.info("🔐 No valid token found. Performing login...")
-            await self._perform_login()
-            await self._perform_token_refresh()
+            await self._perform_token_refresh(relogin=True)
 
     def _load_stored_tokens(self):
         opts = self.config_entry.options
@@ -58,56 +63,58 @@ class SifelyTokenManager:
         _LOGGER.debug("🔐 Requesting Sifely login from: %s", TOKEN_ENDPOINT)
 
         try:
-            async with self.session.post(TOKEN_ENDPOINT, params={
-                "client_id": self.client_id,
-                "username": self.email,
-                "password": self.password,
-            }) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Login HTTP error: {resp.status}")
-
-                resp_json = await resp.json(content_type=None)
-                _LOGGER.debug("🔁 Login response: %s", resp_json)
-
-                if resp_json.get("code") == 200 and "data" in resp_json:
-                    data = resp_json["data"]
-                    self._login_token = data.get("token")
-                    self.refresh_token_value = data.get("refreshToken")
-                else:
-                    raise Exception(f"Login failed: {resp_json}")
+            data = await self.api.async_login(self.client_id, self.email, self.password)
+            self._login_token = data.get("token")
+            self.refresh_token_value = data.get("refreshToken")
         except Exception as e:
-            _LOGGER.exception("🚨 Exception during login: %s", str(e))
+            # Retried by _async_refresh_with_retry, which logs the traceback if it gives up
+            _LOGGER.warning("🚨 Exception during login: %s", str(e))
             raise
 
-    async def _perform_token_refresh(self):
+    async def _perform_token_refresh(self, relogin: bool = False):
+        """Refresh the access token, sharing a single in-flight refresh between callers.
+
+        Concurrent callers (the scheduled refresh, the 401 path, ...) all await the
+        same task instead of each performing their own login and refresh.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self.hass.async_create_task(self._async_refresh_with_retry(relogin))
+        else:
+            _LOGGER.debug("🔄 Token refresh already in progress, waiting for it")
+        await asyncio.shield(self._refresh_task)
+
+    async def _async_refresh_with_retry(self, relogin: bool):
+        """Refresh the token, logging in again and backing off exponentially on failure."""
+        delay = TOKEN_REFRESH_BACKOFF
+        for attempt in range(1, TOKEN_REFRESH_RETRIES + 1):
+            try:
+                if relogin or attempt > 1:
+                    await self._perform_login()
+                await self._request_token_refresh()
+                return
+            except Exception as e:
+                if attempt == TOKEN_REFRESH_RETRIES:
+                    _LOGGER.exception("🚨 Token refresh failed after %d attempts: %s", attempt, e)
+                    raise
+                _LOGGER.warning("🔁 Token refresh attempt %d failed, retrying in %ds: %s", attempt, delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, TOKEN_REFRESH_MAX_BACKOFF)
+
+    async def _request_token_refresh(self):
         _LOGGER.debug("🔄 Refreshing token from: %s", REFRESH_ENDPOINT)
 
         try:
-            async with self.session.post(REFRESH_ENDPOINT, params={
-                "client_id": self.client_id,
-                "grant_type": "refresh_token",
-                "refresh_token": self.refresh_token_value,
-            }) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Refresh HTTP error: {resp.status}")
-
-                resp_json = await resp.json(content_type=None)
-                _LOGGER.debug("🔁 Refresh token response: %s", resp_json)
-
-                if "access_token" in resp_json:
-                    self.access_token = resp_json["access_token"]
-                    self.refresh_token_value = resp_json.get("refresh_token", self.refresh_token_value)
-                    expires_in = resp_json.get("expires_in", 3600)
-                    self._set_token_expiry(expires_in)
-                    await self._store_token()
-                    _LOGGER.info("🔄 Token refreshed. Expires at: %s", self.token_expiry)
-                    self._schedule_token_refresh()
-                else:
-                    raise Exception(f"Refresh failed: {resp_json}")
+            resp_json = await self.api.async_refresh_token(self.client_id, self.refresh_token_value)
+            self.access_token = resp_json["access_token"]
+            self.refresh_token_value = resp_json.get("refresh_token", self.refresh_token_value)
+            expires_in = resp_json.get("expires_in", 3600)
+            self._set_token_expiry(expires_in)
+            await self._store_token()
+            _LOGGER.info("🔄 Token refreshed. Expires at: %s", self.token_expiry)
+            self._schedule_token_refresh()
         except Exception as e:
-            _LOGGER.exception("🚨 Exception during token refresh: %s", str(e))
-            await self._perform_login()
-            await self._perform_token_refresh()
+            _LOGGER.warning("🚨 Exception during token refresh: %s", str(e))
+            raise
 
     def _set_token_expiry(self, expires_in):
         now = datetime.now(timezone.utc)
@@ -126,7 +133,11 @@ class SifelyTokenManager:
 
     async def _handle_token_refresh(self, _):
         _LOGGER.info("🔁 Token refresh scheduled task running...")
-        await self._perform_token_refresh()
+        try:
+            await self._perform_token_refresh()
+        except Exception:
+            # Try again later rather than leaving the token to expire unattended
+            self._refresh_unsub = async_call_later(self.hass, TOKEN_REFRESH_MAX_BACKOFF, self._handle_token_refresh)
 
     async def _store_token(self):
         opts = dict(self.config_entry.options)
@@ -141,11 +152,16 @@ class SifelyTokenManager:
     def get_login_token(self):
         return self._login_token
 
-    async def refresh_login_token(self):
-        await self._perform_login()
+    async def async_refresh_access_token(self):
+        """Refresh the access token (joining any refresh already in flight)."""
         await self._perform_token_refresh()
 
+    async def refresh_login_token(self):
+        await self._perform_token_refresh(relogin=True)
+
     async def async_shutdown(self):
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
         if self._refresh_unsub:
             self._refresh_unsub()
             self._refresh_unsub = None